@@ -0,0 +1,56 @@
+"""add menu search indexes
+
+Revision ID: a9c4e1f3b7d6
+Revises: f7a1d3c5e9b2
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "a9c4e1f3b7d6"
+down_revision = "f7a1d3c5e9b2"
+branch_labels = None
+depends_on = None
+
+
+# Postgres only: generated tsvector columns (not mapped in the ORM; see
+# app.core.menu_search) with GIN indexes, plus trigram indexes for fuzzy
+# name matching. Other dialects use the in-process fallback index.
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        """
+        ALTER TABLE menu_items ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')
+        ) STORED
+        """
+    )
+    for table in ("categories", "subcategories"):
+        op.execute(
+            f"""
+            ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'C')
+            ) STORED
+            """
+        )
+        op.execute(f"CREATE INDEX ix_{table}_search_vector ON {table} USING gin (search_vector)")
+
+    op.execute("CREATE INDEX ix_menu_items_search_vector ON menu_items USING gin (search_vector)")
+    op.execute("CREATE INDEX ix_menu_items_name_trgm ON menu_items USING gin (name gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_menu_items_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_menu_items_search_vector")
+    for table in ("menu_items", "categories", "subcategories"):
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_vector")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
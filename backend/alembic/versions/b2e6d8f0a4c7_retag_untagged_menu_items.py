@@ -0,0 +1,82 @@
+"""retag untagged menu items
+
+Revision ID: b2e6d8f0a4c7
+Revises: a9c4e1f3b7d6
+Create Date: 2026-10-17
+"""
+
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b2e6d8f0a4c7"
+down_revision = "a9c4e1f3b7d6"
+branch_labels = None
+depends_on = None
+
+
+# Rows written after f7a1d3c5e9b2 by paths that didn't compute tags (seed
+# script, plain ORM writers) were left at 0, which the recommend filters read
+# as "no allergens". Frozen snapshot of app.core.dietary as of this revision.
+_VOCABULARY = {
+    1: [  # lactose
+        "cheese", "mozzarella", "cheddar", "parmesan", "cream", "milk", "butter",
+        "yogurt", "ice cream", "dairy", "alfredo", "bechamel", "lactose",
+    ],
+    2: [  # gluten
+        "bread", "bun", "pizza", "pasta", "noodles", "flour", "wheat",
+        "wrap", "tortilla", "breadcrumbs", "cracker", "burger bun",
+    ],
+    4: ["chicken", "tender", "nugget", "wings"],  # chicken
+    8: ["beef", "burger", "steak", "brisket", "veal"],  # beef
+    16: ["fish", "salmon", "tuna", "shrimp", "prawn", "crab", "lobster", "seafood"],  # seafood
+}
+
+_WORDS = {w for ws in _VOCABULARY.values() for w in ws}
+_WORD_BITS = {
+    w: sum({tag for tag, ws in _VOCABULARY.items() if any(o in w for o in ws)})
+    for w in _WORDS
+}
+_MATCHER = re.compile(
+    "(?=({}))".format("|".join(re.escape(w) for w in sorted(_WORDS, key=len, reverse=True)))
+)
+
+
+def _compute_tags(name, description) -> int:
+    text = f"{name or ''} {description or ''}".lower()
+    tags = 0
+    for m in _MATCHER.finditer(text):
+        tags |= _WORD_BITS[m.group(1)]
+    return tags
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    items = sa.table(
+        "menu_items",
+        sa.column("id", sa.Integer),
+        sa.column("name", sa.String),
+        sa.column("description", sa.Text),
+        sa.column("diet_tags", sa.Integer),
+    )
+    rows = conn.execute(
+        sa.select(items.c.id, items.c.name, items.c.description).where(items.c.diet_tags == 0)
+    ).all()
+    updates = [
+        {"item_id": r.id, "tags": _compute_tags(r.name, r.description)}
+        for r in rows
+    ]
+    updates = [u for u in updates if u["tags"]]
+    if updates:
+        conn.execute(
+            items.update().where(items.c.id == sa.bindparam("item_id")).values(diet_tags=sa.bindparam("tags")),
+            updates,
+        )
+
+
+def downgrade() -> None:
+    # tags are derived data; leaving them set is harmless
+    pass
@@ -0,0 +1,27 @@
+"""add restaurant menu revision
+
+Revision ID: c3d7a1e9b5f2
+Revises: f2a3c4d5e6f7
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c3d7a1e9b5f2"
+down_revision = "f2a3c4d5e6f7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "restaurants",
+        sa.Column("menu_revision", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("restaurants", "menu_revision")
@@ -0,0 +1,24 @@
+"""add menu item optimized model url
+
+Revision ID: d8e2f4a6c1b3
+Revises: c3d7a1e9b5f2
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d8e2f4a6c1b3"
+down_revision = "c3d7a1e9b5f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("menu_items", sa.Column("model_optimized_url", sa.String(length=500), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("menu_items", "model_optimized_url")
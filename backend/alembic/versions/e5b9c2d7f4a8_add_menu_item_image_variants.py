@@ -0,0 +1,24 @@
+"""add menu item image variants
+
+Revision ID: e5b9c2d7f4a8
+Revises: d8e2f4a6c1b3
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e5b9c2d7f4a8"
+down_revision = "d8e2f4a6c1b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("menu_items", sa.Column("image_variants", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("menu_items", "image_variants")
@@ -0,0 +1,88 @@
+"""add menu item diet tags
+
+Revision ID: f7a1d3c5e9b2
+Revises: e5b9c2d7f4a8
+Create Date: 2026-10-17
+"""
+
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f7a1d3c5e9b2"
+down_revision = "e5b9c2d7f4a8"
+branch_labels = None
+depends_on = None
+
+
+# Frozen snapshot of app.core.dietary as of this revision, so the backfill
+# stays reproducible when the live vocabulary changes. Don't edit; add a new
+# migration to re-tag instead.
+_VOCABULARY = {
+    1: [  # lactose
+        "cheese", "mozzarella", "cheddar", "parmesan", "cream", "milk", "butter",
+        "yogurt", "ice cream", "dairy", "alfredo", "bechamel", "lactose",
+    ],
+    2: [  # gluten
+        "bread", "bun", "pizza", "pasta", "noodles", "flour", "wheat",
+        "wrap", "tortilla", "breadcrumbs", "cracker", "burger bun",
+    ],
+    4: ["chicken", "tender", "nugget", "wings"],  # chicken
+    8: ["beef", "burger", "steak", "brisket", "veal"],  # beef
+    16: ["fish", "salmon", "tuna", "shrimp", "prawn", "crab", "lobster", "seafood"],  # seafood
+}
+
+_WORDS = {w for ws in _VOCABULARY.values() for w in ws}
+_WORD_BITS = {
+    w: sum({tag for tag, ws in _VOCABULARY.items() if any(o in w for o in ws)})
+    for w in _WORDS
+}
+_MATCHER = re.compile(
+    "(?=({}))".format("|".join(re.escape(w) for w in sorted(_WORDS, key=len, reverse=True)))
+)
+
+
+def _compute_tags(name, description) -> int:
+    text = f"{name or ''} {description or ''}".lower()
+    tags = 0
+    for m in _MATCHER.finditer(text):
+        tags |= _WORD_BITS[m.group(1)]
+    return tags
+
+
+def upgrade() -> None:
+    op.add_column("menu_items", sa.Column("diet_tags", sa.Integer(), nullable=False, server_default="0"))
+    op.create_index(
+        "ix_menu_items_restaurant_available_tags",
+        "menu_items",
+        ["restaurant_id", "is_available", "diet_tags"],
+    )
+
+    # backfill from the snapshot above
+    conn = op.get_bind()
+    items = sa.table(
+        "menu_items",
+        sa.column("id", sa.Integer),
+        sa.column("name", sa.String),
+        sa.column("description", sa.Text),
+        sa.column("diet_tags", sa.Integer),
+    )
+    rows = conn.execute(sa.select(items.c.id, items.c.name, items.c.description)).all()
+    updates = [
+        {"item_id": r.id, "tags": _compute_tags(r.name, r.description)}
+        for r in rows
+    ]
+    updates = [u for u in updates if u["tags"]]
+    if updates:
+        conn.execute(
+            items.update().where(items.c.id == sa.bindparam("item_id")).values(diet_tags=sa.bindparam("tags")),
+            updates,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_menu_items_restaurant_available_tags", table_name="menu_items")
+    op.drop_column("menu_items", "diet_tags")
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+
+from app.core import db as database
+from app.core.db_pool import pool_stats
+from app.core.deps import require_admin
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/db/pool")
+def db_pool(_: str = Depends(require_admin)):
+    out = {"sync": pool_stats(database.engine)}
+    async_engine = database.started_async_engine()
+    if async_engine is not None:
+        out["async"] = pool_stats(async_engine)
+    return out
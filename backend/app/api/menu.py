@@ -1,17 +1,25 @@
-import os, uuid
-import urllib.parse
-import urllib.request
+import json
 from typing import Optional
 
 from app.schemas.restaurants import RestaurantCreate, RestaurantThemeUpdate
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.db import get_db
+from app.core.db import get_async_db, get_db
 from app.core.deps import require_admin
-from app.models.menu import Restaurant, Category, Subcategory, MenuItem
-from app.schemas.menu import MenuResponse, MenuItemOut
-from app.core.config import MEDIA_DIR, BASE_URL
+from app.models.menu import Restaurant, MenuItem
+from app.schemas.menu import MenuResponse, MenuItemOut, ImageVariantOut, MenuSearchResponse
+from app.core.config import BASE_URL
+from app.core.storage import store_upload
+from app.core.media_pipeline import image_derivatives, optimize_model, submit_after_commit
+from app.core.menu_cache import menu_cache
+from app.core.http_cache import conditional, revision_etag
+from app.core.menu_queries import MenuRow, decode_cursor, encode_cursor, load_menu_rows_async
+from app.core.menu_search import search_menu
+from app.core.taxonomy import resolve as resolve_taxonomy
 
 router = APIRouter(prefix="/api", tags=["menu"])
 
@@ -21,15 +29,6 @@ DEFAULT_THEME = {
     "secondary": "#d97706",
 }
 
-def ensure_dir(path: str):
-    os.makedirs(path, exist_ok=True)
-
-
-def file_url(rel_path: str) -> str:
-    # served via StaticFiles at /media
-    return f"{BASE_URL}/media/{rel_path.replace(os.sep, '/')}"
-
-
 def normalize_url(url: str | None) -> str | None:
     if not url:
         return url
@@ -40,27 +39,34 @@ def normalize_url(url: str | None) -> str | None:
     return url
 
 
-def upload_to_supabase(rel_path: str, content: bytes, content_type: str) -> str | None:
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    bucket = os.getenv("SUPABASE_STORAGE_BUCKET")
-    if not (supabase_url and supabase_key and bucket):
-        return None
-    safe_path = "/".join(
-        urllib.parse.quote(p) for p in rel_path.replace("\\", "/").split("/")
+def image_variants_out(raw: str | None) -> dict:
+    if not raw:
+        return {}
+    data = json.loads(raw)
+    return {
+        "imageVariants": [
+            ImageVariantOut(url=normalize_url(v["url"]), width=v["width"], type=v.get("type", "image/webp"))
+            for v in data.get("sources", [])
+        ],
+        "imagePlaceholder": data.get("placeholder"),
+    }
+
+
+def menu_item_out(row: MenuRow) -> MenuItemOut:
+    return MenuItemOut(
+        **image_variants_out(row.image_variants),
+        id=row.id,
+        name=row.name,
+        description=row.description,
+        price=float(row.price),
+        currency=row.currency,
+        category=row.category,
+        subcategory=row.subcategory,
+        imageUrl=normalize_url(row.image_url),
+        modelUrl=normalize_url(row.model_url),
+        modelOptimizedUrl=normalize_url(row.model_optimized_url),
+        isAvailable=row.is_available,
     )
-    base = supabase_url.rstrip("/")
-    object_url = f"{base}/storage/v1/object/{bucket}/{safe_path}"
-    req = urllib.request.Request(object_url, data=content, method="POST")
-    req.add_header("Authorization", f"Bearer {supabase_key}")
-    req.add_header("apikey", supabase_key)
-    req.add_header("Content-Type", content_type)
-    req.add_header("x-upsert", "true")
-    try:
-        urllib.request.urlopen(req)
-    except Exception:
-        return None
-    return f"{base}/storage/v1/object/public/{bucket}/{safe_path}"
 
 
 def theme_for_restaurant(r: Restaurant) -> tuple[str, str, str]:
@@ -70,6 +76,25 @@ def theme_for_restaurant(r: Restaurant) -> tuple[str, str, str]:
     return name, primary, secondary
 
 
+def touch_menu(r: Restaurant) -> None:
+    # SQL-side increment so concurrent writers never hand out the same revision
+    r.menu_revision = Restaurant.menu_revision + 1
+
+
+def menu_surrogate_keys(slug: str, kind: str) -> list[str]:
+    return [f"restaurant-{slug}", f"{kind}-{slug}"]
+
+
+def parse_fields(fields: Optional[str]) -> Optional[set[str]]:
+    if not fields:
+        return None
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = wanted - set(MenuItemOut.model_fields)
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+    return wanted | {"id"}
+
+
 def get_restaurant_or_404(slug: str, db: Session) -> Restaurant:
     r = db.query(Restaurant).filter(Restaurant.slug == slug).first()
     if not r:
@@ -77,6 +102,13 @@ def get_restaurant_or_404(slug: str, db: Session) -> Restaurant:
     return r
 
 
+async def get_restaurant_or_404_async(slug: str, db: AsyncSession) -> Restaurant:
+    r = await db.scalar(select(Restaurant).where(Restaurant.slug == slug))
+    if not r:
+        raise HTTPException(404, "Restaurant not found")
+    return r
+
+
 def get_item_for_restaurant_or_404(item_id: int, r: Restaurant, db: Session) -> MenuItem:
     item = (
         db.query(MenuItem)
@@ -104,43 +136,116 @@ def create_restaurant(payload: RestaurantCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/restaurants/{slug}/menu", response_model=MenuResponse)
-def get_menu(slug: str, db: Session = Depends(get_db)):
-    r = get_restaurant_or_404(slug, db)
+async def get_menu(
+    slug: str,
+    request: Request,
+    response: Response,
+    category: Optional[str] = None,
+    subcategory: Optional[str] = None,
+    available: Optional[bool] = None,
+    min_price: Optional[float] = Query(None, alias="minPrice", ge=0),
+    max_price: Optional[float] = Query(None, alias="maxPrice", ge=0),
+    fields: Optional[str] = Query(None, description="Comma-separated MenuItemOut fields; id is always included"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    filters = {
+        "category": category,
+        "subcategory": subcategory,
+        "available": available,
+        "min_price": min_price,
+        "max_price": max_price,
+    }
+    projection = parse_fields(fields)
+    plain = not any(v is not None for v in filters.values()) and not (projection or limit or cursor)
+
+    keys = menu_surrogate_keys(slug, "menu")
+    # only the plain full listing goes through the snapshot cache
+    cached = menu_cache.get(slug) if plain else None
+    if cached is not None:
+        etag, snapshot = cached
+        return conditional(request, response, etag, keys) or snapshot
+
+    version = menu_cache.version(slug)
+    r = await get_restaurant_or_404_async(slug, db)
+    # ETags are per URL, so one revision tag covers every filter combination
+    etag = revision_etag("menu", r.id, r.menu_revision)
+    not_modified = conditional(request, response, etag, keys)
+    if not_modified is not None:
+        return not_modified
+
+    if cursor:
+        try:
+            filters["after"] = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(400, "Invalid cursor")
+    if limit:
+        # one extra row tells us whether there is a next page
+        filters["limit"] = limit + 1
+
     theme_name, theme_primary, theme_secondary = theme_for_restaurant(r)
 
-    items = (
-        db.query(MenuItem)
-        .filter(MenuItem.restaurant_id == r.id)
-        .all()
-    )
+    rows = await load_menu_rows_async(db, r.id, **filters)
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+    out = [menu_item_out(row) for row in rows]
 
-    out = []
-    for it in items:
-        out.append(MenuItemOut(
-            id=it.id,
-            name=it.name,
-            description=it.description,
-            price=float(it.price),
-            currency=it.currency,
-            category=it.category.name if it.category else None,
-            subcategory=it.subcategory.name if it.subcategory else None,
-            imageUrl=normalize_url(it.image_url),
-            modelUrl=normalize_url(it.model_url),
-            isAvailable=it.is_available
-        ))
-
-    return MenuResponse(
+    snapshot = MenuResponse(
         restaurantSlug=slug,
         items=out,
+        nextCursor=next_cursor,
         themeName=theme_name,
         themePrimary=theme_primary,
         themeSecondary=theme_secondary,
     )
+    if plain:
+        menu_cache.put(slug, version, (etag, snapshot))
+    if projection:
+        body = snapshot.model_dump(exclude_none=True)
+        body["items"] = [item.model_dump(include=projection) for item in out]
+        return JSONResponse(body, headers=dict(response.headers))
+    return snapshot
 
 
-@router.get("/restaurants/{slug}/theme")
-def get_theme(slug: str, db: Session = Depends(get_db)):
+@router.get("/restaurants/{slug}/search", response_model=MenuSearchResponse)
+def search_items(
+    slug: str,
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
     r = get_restaurant_or_404(slug, db)
+    # results only change with the menu revision (ETags are per URL, so the
+    # query string needn't be part of the tag)
+    etag = revision_etag("search", r.id, r.menu_revision)
+    not_modified = conditional(request, response, etag, menu_surrogate_keys(slug, "menu"))
+    if not_modified is not None:
+        return not_modified
+
+    # one extra row tells us whether there is a next page
+    rows = search_menu(db, r.id, r.menu_revision, q.strip(), limit + 1, offset)
+    return MenuSearchResponse(
+        restaurantSlug=slug,
+        query=q,
+        items=[menu_item_out(row) for row in rows[:limit]],
+        nextOffset=offset + limit if len(rows) > limit else None,
+    )
+
+
+@router.get("/restaurants/{slug}/theme")
+async def get_theme(slug: str, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    r = await get_restaurant_or_404_async(slug, db)
+    etag = revision_etag("theme", r.id, r.menu_revision)
+    not_modified = conditional(request, response, etag, menu_surrogate_keys(slug, "theme"))
+    if not_modified is not None:
+        return not_modified
+
     theme_name, theme_primary, theme_secondary = theme_for_restaurant(r)
     return {
         "themeName": theme_name,
@@ -160,8 +265,10 @@ def update_theme(
     r.theme_name = payload.name.strip() if payload.name else DEFAULT_THEME["name"]
     r.theme_primary = payload.primary.strip() if payload.primary else DEFAULT_THEME["primary"]
     r.theme_secondary = payload.secondary.strip() if payload.secondary else DEFAULT_THEME["secondary"]
+    touch_menu(r)
     db.add(r)
     db.commit()
+    menu_cache.bump(r.slug)
     return {
         "themeName": r.theme_name,
         "themePrimary": r.theme_primary,
@@ -183,71 +290,32 @@ def create_item(
 ):
     r = get_restaurant_or_404(slug, db)
 
-    cat_obj = None
-    sub_obj = None
-
-    if category.strip():
-        cat_obj = db.query(Category).filter(
-            Category.restaurant_id == r.id, Category.name == category
-        ).first()
-        if not cat_obj:
-            cat_obj = Category(restaurant_id=r.id, name=category)
-            db.add(cat_obj)
-            db.flush()
-
-        if subcategory.strip():
-            sub_obj = db.query(Subcategory).filter(
-                Subcategory.category_id == cat_obj.id, Subcategory.name == subcategory
-            ).first()
-            if not sub_obj:
-                sub_obj = Subcategory(category_id=cat_obj.id, name=subcategory)
-                db.add(sub_obj)
-                db.flush()
-
-    image_url = None
-    model_url = None
-
-    ensure_dir(MEDIA_DIR)
-    rest_dir = os.path.join(MEDIA_DIR, slug)
-    ensure_dir(rest_dir)
+    category_id, subcategory_id = resolve_taxonomy(db, r.id, category, subcategory)
 
-    if image:
-        ext = os.path.splitext(image.filename or "")[1] or ".jpg"
-        fname = f"{uuid.uuid4().hex}{ext}"
-        rel = os.path.join(slug, fname)
-        content = image.file.read()
-        image_url = upload_to_supabase(rel, content, image.content_type or "image/jpeg")
-        if not image_url:
-            full = os.path.join(MEDIA_DIR, rel)
-            with open(full, "wb") as f:
-                f.write(content)
-            image_url = file_url(rel)
-
-    if model:
-        ext = os.path.splitext(model.filename or "")[1] or ".glb"
-        fname = f"{uuid.uuid4().hex}{ext}"
-        rel = os.path.join(slug, fname)
-        content = model.file.read()
-        model_url = upload_to_supabase(rel, content, model.content_type or "model/gltf-binary")
-        if not model_url:
-            full = os.path.join(MEDIA_DIR, rel)
-            with open(full, "wb") as f:
-                f.write(content)
-            model_url = file_url(rel)
+    image_media = store_upload(image, "image", db) if image else None
+    model_media = store_upload(model, "model", db) if model else None
 
     item = MenuItem(
         restaurant_id=r.id,
-        category_id=cat_obj.id if cat_obj else None,
-        subcategory_id=sub_obj.id if sub_obj else None,
+        category_id=category_id,
+        subcategory_id=subcategory_id,
         name=name,
         description=description,
         price=price,
-        image_url=image_url,
-        model_url=model_url,
+        image_url=image_media.url if image_media else None,
+        model_url=model_media.url if model_media else None,
         is_available=True
     )
     db.add(item)
+    if image_media or model_media:
+        db.flush()
+    if image_media:
+        submit_after_commit(db, image_derivatives, item.id, image_media)
+    if model_media:
+        submit_after_commit(db, optimize_model, item.id, model_media)
+    touch_menu(r)
     db.commit()
+    menu_cache.bump(r.slug)
     db.refresh(item)
 
     return {"id": item.id}
@@ -270,59 +338,32 @@ def _update_item(
 ):
     slug = r.slug
 
-    # Category/Subcategory (optional)
-    cat_obj = None
-    sub_obj = None
-
-    if category.strip():
-        cat_obj = db.query(Category).filter(
-            Category.restaurant_id == r.id, Category.name == category
-        ).first()
-        if not cat_obj:
-            cat_obj = Category(restaurant_id=r.id, name=category)
-            db.add(cat_obj)
-            db.flush()
-
-        if subcategory.strip():
-            sub_obj = db.query(Subcategory).filter(
-                Subcategory.category_id == cat_obj.id, Subcategory.name == subcategory
-            ).first()
-            if not sub_obj:
-                sub_obj = Subcategory(category_id=cat_obj.id, name=subcategory)
-                db.add(sub_obj)
-                db.flush()
+    # Category/Subcategory (optional): cached ids, upserted when new
+    category_id, subcategory_id = resolve_taxonomy(db, r.id, category, subcategory)
 
     # Upload new files if provided
-    ensure_dir(MEDIA_DIR)
-    rest_dir = os.path.join(MEDIA_DIR, slug)
-    ensure_dir(rest_dir)
-
     if image:
-        ext = os.path.splitext(image.filename or "")[1] or ".jpg"
-        fname = f"{uuid.uuid4().hex}{ext}"
-        rel = os.path.join(slug, fname)
-        full = os.path.join(MEDIA_DIR, rel)
-        with open(full, "wb") as f:
-            f.write(image.file.read())
-        item.image_url = file_url(rel)
+        image_media = store_upload(image, "image", db)
+        item.image_url = image_media.url
+        item.image_variants = None
+        submit_after_commit(db, image_derivatives, item.id, image_media)
 
     if model:
-        ext = os.path.splitext(model.filename or "")[1] or ".glb"
-        fname = f"{uuid.uuid4().hex}{ext}"
-        rel = os.path.join(slug, fname)
-        full = os.path.join(MEDIA_DIR, rel)
-        with open(full, "wb") as f:
-            f.write(model.file.read())
-        item.model_url = file_url(rel)
+        model_media = store_upload(model, "model", db)
+        item.model_url = model_media.url
+        item.model_optimized_url = None
+        submit_after_commit(db, optimize_model, item.id, model_media)
 
     # Update fields
     item.name = name
     item.description = description
     item.price = price
-    item.category_id = cat_obj.id if cat_obj else None
-    item.subcategory_id = sub_obj.id if sub_obj else None
+    item.category_id = category_id
+    item.subcategory_id = subcategory_id
+    touch_menu(r)
 
     db.commit()
+    menu_cache.bump(slug)
     db.refresh(item)
 
     return {
@@ -335,7 +376,9 @@ def _update_item(
             "category": item.category.name if item.category else None,
             "subcategory": item.subcategory.name if item.subcategory else None,
             "imageUrl": normalize_url(item.image_url),
+            **image_variants_out(item.image_variants),
             "modelUrl": normalize_url(item.model_url),
+            "modelOptimizedUrl": normalize_url(item.model_optimized_url),
             "isAvailable": item.is_available,
         }
     }
@@ -447,8 +490,12 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
     if not item:
         raise HTTPException(404, "Item not found")
 
+    r = item.restaurant
+    slug = r.slug
     db.delete(item)
+    touch_menu(r)
     db.commit()
+    menu_cache.bump(slug)
     return {"ok": True}
 
 
@@ -460,7 +507,9 @@ def delete_item_scoped(slug: str, item_id: int, db: Session = Depends(get_db)):
     r = get_restaurant_or_404(slug, db)
     item = get_item_for_restaurant_or_404(item_id, r, db)
     db.delete(item)
+    touch_menu(r)
     db.commit()
+    menu_cache.bump(r.slug)
     return {"ok": True}
 
 
@@ -0,0 +1,240 @@
+import json
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.api.menu import get_restaurant_or_404, menu_item_out, touch_menu
+from app.core.config import IMPORT_BATCH_SIZE, IMPORT_MAX_BYTES, IMPORT_MAX_ROWS
+from app.core.db import get_db
+from app.core.dietary import compute_tags
+from app.core.deps import require_admin
+from app.core.menu_cache import menu_cache
+from app.core.menu_io import RowError, clean_row, export_record, iter_csv, read_records
+from app.core.menu_queries import MenuRow, load_menu_rows
+from app.core.taxonomy import resolve_many
+from app.models.menu import MenuItem
+from app.schemas.menu import AvailabilityUpdate, ItemPatch, ItemsPatch, ItemsPatchOut
+
+router = APIRouter(prefix="/api", tags=["menu-bulk"])
+
+MAX_REPORTED_ERRORS = 100
+
+
+def _detect_format(file: UploadFile) -> str:
+    name = (file.filename or "").lower()
+    if name.endswith(".json") or "json" in (file.content_type or ""):
+        return "json"
+    return "csv"
+
+
+# ---------- Import / export ----------
+@router.post("/restaurants/{slug}/import")
+def import_menu(
+    slug: str,
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "json"]] = Query(None),
+    replace: bool = Query(False, description="Delete the current items first"),
+    db: Session = Depends(get_db),
+    _: str = Depends(require_admin),
+):
+    """
+    Bulk-load a menu from CSV or JSON in one transaction: every row is
+    validated first (nothing is written if any row fails), taxonomy names
+    are resolved in one pass, and items go in as batched multi-row INSERTs.
+    """
+    r = get_restaurant_or_404(slug, db)
+    fmt = format or _detect_format(file)
+
+    data = file.file.read(IMPORT_MAX_BYTES + 1)
+    if len(data) > IMPORT_MAX_BYTES:
+        raise HTTPException(413, f"Import file larger than {IMPORT_MAX_BYTES} bytes")
+    try:
+        records = read_records(data, fmt)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(400, f"Could not read {fmt.upper()} file: {e}")
+    if len(records) > IMPORT_MAX_ROWS:
+        raise HTTPException(413, f"Import has {len(records)} rows; the limit is {IMPORT_MAX_ROWS}")
+
+    rows = []
+    errors = []
+    for n, raw in enumerate(records, start=1):
+        try:
+            rows.append(clean_row(raw))
+        except RowError as e:
+            errors.append({"row": n, "error": str(e)})
+    if errors:
+        raise HTTPException(422, {"errors": errors[:MAX_REPORTED_ERRORS], "errorCount": len(errors)})
+
+    taxonomy = resolve_many(db, r.id, {(row["category"], row["subcategory"]) for row in rows if row["category"]})
+
+    if replace:
+        db.execute(delete(MenuItem).where(MenuItem.restaurant_id == r.id))
+
+    values = []
+    for row in rows:
+        category_id, subcategory_id = taxonomy.get((row.pop("category"), row.pop("subcategory")), (None, None))
+        values.append({**row, "restaurant_id": r.id, "category_id": category_id, "subcategory_id": subcategory_id})
+    for start in range(0, len(values), IMPORT_BATCH_SIZE):
+        db.execute(insert(MenuItem), values[start:start + IMPORT_BATCH_SIZE])
+
+    touch_menu(r)
+    db.commit()
+    menu_cache.bump(r.slug)
+    return {"imported": len(values), "replaced": replace}
+
+
+@router.get("/restaurants/{slug}/export")
+def export_menu(
+    slug: str,
+    format: Literal["csv", "json"] = Query("csv"),
+    db: Session = Depends(get_db),
+    _: str = Depends(require_admin),
+):
+    r = get_restaurant_or_404(slug, db)
+    rows = load_menu_rows(db, r.id)
+    disposition = {"Content-Disposition": f'attachment; filename="{slug}-menu.{format}"'}
+    if format == "json":
+        body = json.dumps({"items": [export_record(row) for row in rows]}, ensure_ascii=False)
+        return Response(body, media_type="application/json", headers=disposition)
+    return StreamingResponse(iter_csv(rows), media_type="text/csv; charset=utf-8", headers=disposition)
+
+
+# ---------- Availability ("86") ----------
+@router.post("/restaurants/{slug}/items/availability")
+def set_availability(
+    slug: str,
+    payload: AvailabilityUpdate,
+    db: Session = Depends(get_db),
+    _: str = Depends(require_admin),
+):
+    """
+    Mark many items (by id and/or whole categories) available or sold out
+    with one UPDATE; only rows that actually change are touched.
+    """
+    if not payload.itemIds and not payload.categoryIds:
+        raise HTTPException(400, "Provide itemIds and/or categoryIds")
+    r = get_restaurant_or_404(slug, db)
+
+    targets = []
+    if payload.itemIds:
+        targets.append(MenuItem.id.in_(set(payload.itemIds)))
+    if payload.categoryIds:
+        targets.append(MenuItem.category_id.in_(set(payload.categoryIds)))
+    changed = db.execute(
+        update(MenuItem)
+        .where(
+            MenuItem.restaurant_id == r.id,
+            or_(*targets),
+            MenuItem.is_available.is_not(payload.available),
+        )
+        .values(is_available=payload.available)
+        .returning(MenuItem.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    if changed:
+        touch_menu(r)
+    db.commit()
+    if changed:
+        menu_cache.bump(r.slug)
+    return {"available": payload.available, "changedIds": sorted(changed)}
+
+
+# ---------- Batched partial updates ----------
+_PATCH_COLUMNS = {"name": "name", "description": "description", "price": "price", "currency": "currency", "isAvailable": "is_available"}
+
+
+def _patch_values(patch: ItemPatch, current: MenuRow) -> dict:
+    """Changed scalar columns for one item (taxonomy handled separately)."""
+    values = {}
+    for field in patch.model_fields_set & set(_PATCH_COLUMNS):
+        value = getattr(patch, field)
+        if field in ("name", "description", "currency") and value is not None:
+            value = value.strip()
+            value = value.upper() if field == "currency" else value
+        if field == "price" and value is not None:
+            value = round(value, 2)
+        if value is None and field != "description":
+            raise HTTPException(400, f"Item {patch.id}: {field} cannot be null")
+        old = getattr(current, _PATCH_COLUMNS[field])
+        if field == "price":
+            old = float(old)
+        if value != old:
+            values[_PATCH_COLUMNS[field]] = value
+    if "name" in values or "description" in values:
+        values["diet_tags"] = compute_tags(
+            values.get("name", current.name), values.get("description", current.description)
+        )
+    return values
+
+
+def _patch_taxonomy(patch: ItemPatch, current: MenuRow) -> Optional[tuple]:
+    """Target (category, subcategory) names if the patch moves the item, else None."""
+    fields = patch.model_fields_set
+    if "category" not in fields and "subcategory" not in fields:
+        return None
+    if "category" in fields:
+        category = (patch.category or "").strip() or None
+        # a new category drops the old subcategory unless one is given
+        subcategory = (patch.subcategory or "").strip() or None if "subcategory" in fields else None
+        if category == current.category and "subcategory" not in fields:
+            subcategory = current.subcategory
+    else:
+        category = current.category
+        subcategory = (patch.subcategory or "").strip() or None
+    if subcategory and not category:
+        raise HTTPException(400, f"Item {patch.id}: subcategory given without category")
+    if (category, subcategory) == (current.category, current.subcategory):
+        return None
+    return category, subcategory
+
+
+@router.patch("/restaurants/{slug}/items", response_model=ItemsPatchOut)
+def patch_items(
+    slug: str,
+    payload: ItemsPatch,
+    db: Session = Depends(get_db),
+    _: str = Depends(require_admin),
+):
+    """
+    Partial JSON updates for many items in one transaction: current rows are
+    read in one SELECT, new taxonomy names resolved in one pass, and the
+    changes applied as a bulk UPDATE by primary key. Returns changed rows only.
+    """
+    ids = [p.id for p in payload.items]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(400, "Each item id may appear only once")
+    r = get_restaurant_or_404(slug, db)
+
+    current = {row.id: row for row in load_menu_rows(db, r.id, item_ids=ids)}
+    missing = sorted(set(ids) - set(current))
+    if missing:
+        raise HTTPException(404, f"Items not found in restaurant: {', '.join(map(str, missing))}")
+
+    updates = {}
+    moves = {}
+    for patch in payload.items:
+        values = _patch_values(patch, current[patch.id])
+        if values:
+            updates[patch.id] = values
+        target = _patch_taxonomy(patch, current[patch.id])
+        if target is not None:
+            moves[patch.id] = target
+
+    if moves:
+        taxonomy = resolve_many(db, r.id, {t for t in moves.values() if t[0]})
+        for item_id, target in moves.items():
+            category_id, subcategory_id = taxonomy.get(target, (None, None))
+            updates.setdefault(item_id, {}).update(category_id=category_id, subcategory_id=subcategory_id)
+
+    if not updates:
+        return {"items": []}
+
+    db.execute(update(MenuItem), [{"id": item_id, **values} for item_id, values in updates.items()])
+    touch_menu(r)
+    db.commit()
+    menu_cache.bump(r.slug)
+    return {"items": [menu_item_out(row) for row in load_menu_rows(db, r.id, item_ids=updates)]}
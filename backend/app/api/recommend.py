@@ -1,15 +1,41 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
-import os
+from typing import List, Literal, NamedTuple, Optional, Sequence
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
 import json
-
-from app.core.db import get_db
-from app.models.menu import Restaurant, MenuItem
-from openai import OpenAI
+import logging
+import time
+
+from app.core.cache import LRUCache
+from app.core.config import (
+    RECOMMEND_BATCH_CONCURRENCY,
+    RECOMMEND_BATCH_MAX_PROFILES,
+    RECOMMEND_CACHE_MAX_ENTRIES,
+    RECOMMEND_CACHE_TTL,
+)
+from app.core.db import get_async_db
+from app.core.deps import require_admin
+from app.core.dietary import hard_filter_masks, passes
+from app.core.llm import LLMNotConfigured, LLMUnavailable, llm
+from app.core.local_ranker import FeatureIndex, index_for, rank_local
+from app.core.menu_queries import MenuRow, load_menu_rows_async
+from app.core.prompting import (
+    PickStreamParser,
+    build_prompt,
+    estimate_tokens,
+    legacy_prompt_tokens,
+    menu_block_for,
+    prompt_metrics,
+    select_candidates,
+)
+from app.core.singleflight import SingleFlight
+from app.models.menu import Restaurant
 
 router = APIRouter(prefix="/api", tags=["recommendations"])
+log = logging.getLogger(__name__)
 
 
 # ---------- Schemas ----------
@@ -28,154 +54,224 @@ class RecommendOutItem(BaseModel):
 
 class RecommendOut(BaseModel):
     picks: List[RecommendOutItem]
+    source: str = "llm"                        # "llm" or "local" (degraded)
 
 
-# ---------- OpenAI ----------
-def _get_openai_client() -> OpenAI:
-    key = os.getenv("OPENAI_API_KEY")
-    if not key:
-        raise HTTPException(status_code=500, detail="OPENAI_API_KEY not set in backend/.env")
-    return OpenAI(api_key=key)
+class RecommendBatchIn(BaseModel):
+    profiles: List[RecommendIn] = Field(..., min_length=1, max_length=RECOMMEND_BATCH_MAX_PROFILES)
 
 
-# ---------- Rule-based filters (keyword heuristics) ----------
-def looks_lactose(item_name: str, item_desc: str) -> bool:
-    t = f"{item_name} {item_desc}".lower()
-    lactose_words = [
-        "cheese", "mozzarella", "cheddar", "parmesan", "cream", "milk", "butter",
-        "yogurt", "ice cream", "dairy", "alfredo", "bechamel", "lactose"
-    ]
-    return any(w in t for w in lactose_words)
+class RecommendBatchOut(BaseModel):
+    results: List[RecommendOut]                # same order as profiles
 
 
-def looks_gluten(item_name: str, item_desc: str) -> bool:
-    t = f"{item_name} {item_desc}".lower()
-    gluten_words = [
-        "bread", "bun", "pizza", "pasta", "noodles", "flour", "wheat",
-        "wrap", "tortilla", "breadcrumbs", "cracker", "burger bun"
-    ]
-    return any(w in t for w in gluten_words)
+# ---------- Result cache ----------
+# (restaurant id, menu revision, canonical preferences) -> {"picks": [...]}.
+# The revision moves on every menu write, which retires stale entries.
+recommend_cache = LRUCache(max_entries=RECOMMEND_CACHE_MAX_ENTRIES, ttl=RECOMMEND_CACHE_TTL)
+# Concurrent misses for the same key (a whole table scanning at once) share one upstream call.
+recommend_flight = SingleFlight()
 
+_WILDCARDS = {"", "any", "none", "no preference"}
 
-def matches_protein(preference: Optional[str], item_name: str, item_desc: str) -> bool:
-    """
-    Hard filter for protein preference:
-    - If preference is set, item must contain matching keywords.
-    - If preference not set, allow all.
-    """
-    if not preference:
-        return True
 
-    pref = str(preference).lower().strip()
-    t = f"{item_name} {item_desc}".lower()
+def canonical_preferences(payload: RecommendIn) -> RecommendIn:
+    """Normalize case/whitespace/order so equivalent requests share a cache key."""
+    def norm(v: Optional[str]) -> Optional[str]:
+        v = (v or "").strip().lower()
+        return None if v in _WILDCARDS else v
 
-    chicken_words = ["chicken", "tender", "nugget", "wings"]
-    beef_words = ["beef", "burger", "steak", "brisket", "veal"]
-    seafood_words = ["fish", "salmon", "tuna", "shrimp", "prawn", "crab", "lobster", "seafood"]
+    allergies = sorted({a for a in (norm(str(a)) for a in payload.allergies or []) if a})
+    return RecommendIn(
+        diet=norm(payload.diet),
+        allergies=allergies or None,
+        preference=norm(payload.preference),
+        mood=norm(payload.mood),
+        budget=round(payload.budget, 2) if payload.budget else None,
+    )
 
-    if pref == "chicken":
-        return any(w in t for w in chicken_words)
-    if pref == "beef":
-        return any(w in t for w in beef_words)
-    if pref == "seafood":
-        return any(w in t for w in seafood_words)
 
-    # unknown preference -> do not filter
-    return True
+def cache_key(r: Restaurant, prefs: RecommendIn) -> tuple:
+    return (r.id, r.menu_revision, json.dumps(prefs.model_dump(), sort_keys=True))
 
 
 # ---------- Route ----------
-@router.post("/restaurants/{slug}/recommend", response_model=RecommendOut)
-def recommend(slug: str, payload: RecommendIn, db: Session = Depends(get_db)):
-    # 1) Load restaurant
-    r = db.query(Restaurant).filter(Restaurant.slug == slug).first()
+async def _get_restaurant(db: AsyncSession, slug: str) -> Restaurant:
+    r = await db.scalar(select(Restaurant).where(Restaurant.slug == slug))
     if not r:
         raise HTTPException(status_code=404, detail="Restaurant not found")
+    return r
+
+
+@router.post("/restaurants/{slug}/recommend", response_model=RecommendOut)
+async def recommend(
+    slug: str,
+    payload: RecommendIn,
+    mode: Literal["llm", "local"] = Query("llm"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # 1) Load restaurant
+    r = await _get_restaurant(db, slug)
+    prefs = canonical_preferences(payload)
+
+    # mode=local: zero-network ranking on the precomputed feature index
+    if mode == "local":
+        return await _recommend_local(r, prefs, db)
+
+    return await _recommend_cached(r, prefs, db)
+
+
+async def _recommend_cached(
+    r: Restaurant,
+    prefs: RecommendIn,
+    db: AsyncSession,
+    menu: Optional[Sequence[MenuRow]] = None,
+) -> dict:
+    # 2) Same menu revision + same normalized preferences -> cached answer
+    key = cache_key(r, prefs)
+    cached = recommend_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def compute() -> dict:
+        result = await _recommend_uncached(r, prefs, db, menu)
+        # degraded answers aren't cached so the LLM gets asked again once it recovers
+        if result.get("source") != "local":
+            recommend_cache.put(key, result)
+        return result
+
+    return await recommend_flight.do(key, compute)
+
+
+@router.post("/restaurants/{slug}/recommend/batch", response_model=RecommendBatchOut)
+async def recommend_batch(slug: str, payload: RecommendBatchIn, db: AsyncSession = Depends(get_async_db)):
+    """
+    Picks for a whole table: the restaurant and its available items are
+    loaded once and filtered per profile in memory; identical profiles share
+    one answer and distinct ones fan out to the LLM a few at a time.
+    """
+    r = await _get_restaurant(db, slug)
+    menu = await load_menu_rows_async(db, r.id, available_only=True)
+
+    gate = asyncio.Semaphore(RECOMMEND_BATCH_CONCURRENCY)
+
+    async def one(profile: RecommendIn) -> dict:
+        async with gate:
+            return await _recommend_cached(r, canonical_preferences(profile), db, menu)
+
+    results = await asyncio.gather(*(one(p) for p in payload.profiles))
+    return {"results": results}
 
-    # 2) Load menu items
-    items = (
-        db.query(MenuItem)
-        .filter(MenuItem.restaurant_id == r.id, MenuItem.is_available == True)
-        .all()
-    )
-    if not items:
-        return {"picks": []}
 
-    # 3) HARD FILTERS BEFORE AI (allergies + protein preference)
-    allergies = payload.allergies or []
-    want_lactose_free = any(str(a).lower() == "lactose" for a in allergies)
-    want_gluten_free = any(str(a).lower() == "gluten" for a in allergies)
+async def _recommend_local(r: Restaurant, prefs: RecommendIn, db: AsyncSession) -> dict:
+    index = await index_for(r.id, r.menu_revision, lambda: load_menu_rows_async(db, r.id, available_only=True))
+    exclude, require = hard_filter_masks(prefs.allergies, prefs.preference)
+    picks = index.rank(prefs.preference, prefs.mood, prefs.diet, prefs.budget, exclude=exclude, require=require)
+    return {"picks": picks, "source": "local"}
 
-    filtered_items = []
-    for it in items:
-        name = it.name or ""
-        desc = it.description or ""
 
-        # allergy constraints (hard)
-        if want_lactose_free and looks_lactose(name, desc):
-            continue
-        if want_gluten_free and looks_gluten(name, desc):
-            continue
+@router.get("/recommend/stats")
+def recommend_stats(_: str = Depends(require_admin)):
+    return {
+        "cache": recommend_cache.stats(),
+        "singleFlight": recommend_flight.stats(),
+        "llm": llm.stats(),
+        "prompt": prompt_metrics.stats(),
+    }
+
 
-        # protein constraint (hard)
-        if not matches_protein(payload.preference, name, desc):
-            continue
+class _Prepared(NamedTuple):
+    items: list                                # hard-filtered rows
+    candidates: list                           # pre-ranked subset sent to the model
+    prompt: str
+    stable_prefix: bool
+    legacy_tokens: int
+
+
+async def _prepare(
+    r: Restaurant,
+    payload: RecommendIn,
+    db: AsyncSession,
+    menu: Optional[Sequence[MenuRow]] = None,
+) -> Optional[_Prepared]:
+    # 3) Keep only items passing the HARD FILTERS (allergies + protein
+    # preference): in SQL on the precomputed diet_tags bitmask, or in memory
+    # when the caller already loaded the available menu (batch)
+    exclude, require = hard_filter_masks(payload.allergies, payload.preference)
+    if menu is None:
+        items = await load_menu_rows_async(
+            db, r.id, available_only=True, exclude_tags=exclude, require_tags=require
+        )
 
-        filtered_items.append(it)
+        async def load_menu() -> Sequence[MenuRow]:
+            return await load_menu_rows_async(db, r.id, available_only=True)
+    else:
+        items = [row for row in menu if passes(row.diet_tags or 0, exclude, require)]
 
-    items = filtered_items
+        async def load_menu() -> Sequence[MenuRow]:
+            return menu
     if not items:
         # Nothing matches strict constraints
-        return {"picks": []}
+        return None
 
-    # 4) Prepare menu for model
-    menu_compact = [
-        {
-            "id": it.id,
-            "name": it.name,
-            "description": it.description or "",
-            "price": float(it.price),
-            "currency": it.currency,
-            "category": it.category.name if it.category else None,
-            "subcategory": it.subcategory.name if it.subcategory else None,
-        }
-        for it in items
-    ]
-
-    # 5) Prompt (AI ranks ONLY among the already-filtered items)
-    instructions = (
-        "You are a restaurant menu recommender.\n"
-        "Rules:\n"
-        "- Only recommend from the provided menu items.\n"
-        "- The menu was already filtered for allergies and protein preference. Do not violate constraints.\n"
-        "- Return UP TO 3 DIFFERENT items (unique IDs). If fewer items exist, return fewer.\n"
-        "- IDs must be UNIQUE. Never repeat the same id.\n"
-        "- Return STRICT JSON ONLY with this exact shape:\n"
-        '  {"picks":[{"id":<int>,"reason":"<short>"}]}\n'
-        "- No extra text, no markdown.\n"
-    )
+    # 4) Pre-rank locally and keep the top K within the token budget
+    prefs = payload.model_dump()
+    ranked = FeatureIndex(items).ranked_rows(payload.preference, payload.mood, payload.diet, payload.budget)
+    candidates = select_candidates(ranked)
+
+    # 5) Prompt: stable instructions, MENU (the candidates, or the shared
+    # per-revision block when enabled), per-diner CANDIDATES and PREFERENCES last
+    menu_block = await menu_block_for(r.id, r.menu_revision, load_menu)
+    prompt = build_prompt(menu_block, candidates, prefs)
+    return _Prepared(items, candidates, prompt, bool(menu_block), legacy_prompt_tokens(items, prefs))
 
-    user_payload = {
-        "preferences": payload.model_dump(),
-        "menu": menu_compact,
-    }
 
-    prompt = instructions + "\nDATA:\n" + json.dumps(user_payload, ensure_ascii=False)
+def _local_fallback(prep: _Prepared, payload: RecommendIn, k: int = 3) -> list[dict]:
+    return rank_local(prep.items, payload.preference, payload.mood, payload.diet, payload.budget, k=k)
 
-    # 6) Call OpenAI
+
+def _valid_pick(p, valid_ids: set, seen: set) -> Optional[dict]:
+    """One model pick -> {"id", "reason"} if it is a new, allowed id; else None."""
     try:
-        client = _get_openai_client()
-        resp = client.responses.create(
-            model="gpt-4.1-mini",
-            input=prompt,
-        )
-        text = (getattr(resp, "output_text", "") or "").strip()
-        if not text:
-            raise HTTPException(status_code=500, detail="AI returned empty response text.")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"OpenAI call failed: {str(e)}")
+        pid = int(p.get("id"))
+    except Exception:
+        return None
+
+    if pid not in valid_ids:
+        return None
+    if pid in seen:
+        return None
+
+    seen.add(pid)
+    reason = str(p.get("reason", ""))[:160]
+    return {"id": pid, "reason": reason}
+
+
+async def _recommend_uncached(
+    r: Restaurant,
+    payload: RecommendIn,
+    db: AsyncSession,
+    menu: Optional[Sequence[MenuRow]] = None,
+) -> dict:
+    prep = await _prepare(r, payload, db, menu)
+    if prep is None:
+        return {"picks": []}
+
+    # 6) Call OpenAI (shared async client: deadline, concurrency cap, breaker).
+    # If the provider is down or slow, fall back to the local ranker.
+    started = time.perf_counter()
+    try:
+        text = await llm.complete(prep.prompt)
+    except LLMNotConfigured as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    except LLMUnavailable as e:
+        log.warning("recommend falling back to local ranking: %s", e)
+        return {"picks": _local_fallback(prep, payload), "source": "local"}
+    prompt_metrics.record(
+        estimate_tokens(prep.prompt), prep.legacy_tokens, prep.stable_prefix, time.perf_counter() - started
+    )
+    if not text:
+        raise HTTPException(status_code=500, detail="AI returned empty response text.")
 
     # 7) Parse JSON + enforce uniqueness + validate ids
     try:
@@ -184,24 +280,15 @@ def recommend(slug: str, payload: RecommendIn, db: Session = Depends(get_db)):
         if not isinstance(picks_raw, list):
             picks_raw = []
 
-        valid_ids = {it.id for it in items}
+        valid_ids = {it.id for it in prep.candidates}
 
         seen = set()
         filtered = []
         for p in picks_raw:
-            try:
-                pid = int(p.get("id"))
-            except Exception:
-                continue
-
-            if pid not in valid_ids:
-                continue
-            if pid in seen:
+            pick = _valid_pick(p, valid_ids, seen)
+            if pick is None:
                 continue
-
-            seen.add(pid)
-            reason = str(p.get("reason", ""))[:160]
-            filtered.append({"id": pid, "reason": reason})
+            filtered.append(pick)
 
             # up to 3 only
             if len(filtered) == 3:
@@ -212,3 +299,89 @@ def recommend(slug: str, payload: RecommendIn, db: Session = Depends(get_db)):
 
     except Exception:
         raise HTTPException(status_code=500, detail=f"AI returned invalid JSON: {text[:400]}")
+
+
+# ---------- Streaming ----------
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/restaurants/{slug}/recommend/stream")
+async def recommend_stream(slug: str, payload: RecommendIn, db: AsyncSession = Depends(get_async_db)):
+    """
+    Server-Sent Events variant of /recommend: one ``pick`` event per
+    validated pick as soon as the model has produced it, then ``done``
+    with the source ("llm", "local" or "cache").
+    """
+    r = await _get_restaurant(db, slug)
+    prefs = canonical_preferences(payload)
+    key = cache_key(r, prefs)
+    cached = recommend_cache.get(key)
+    # all DB work happens here, before the response starts streaming
+    prep = None if cached is not None else await _prepare(r, prefs, db)
+
+    async def events():
+        if cached is not None:
+            for pick in cached["picks"]:
+                yield _sse("pick", pick)
+            yield _sse("done", {"source": "cache"})
+            return
+        if prep is None:
+            yield _sse("done", {"source": "llm"})
+            return
+
+        started = time.perf_counter()
+        valid_ids = {it.id for it in prep.candidates}
+        seen: set = set()
+        picks: list[dict] = []
+        parser = PickStreamParser()
+        text: list[str] = []
+        try:
+            async for delta in llm.stream(prep.prompt):
+                text.append(delta)
+                for p in parser.feed(delta):
+                    pick = _valid_pick(p, valid_ids, seen)
+                    if pick is None or len(picks) == 3:
+                        continue
+                    if not picks:
+                        prompt_metrics.record_first_pick(time.perf_counter() - started)
+                    picks.append(pick)
+                    yield _sse("pick", pick)
+        except LLMNotConfigured as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        except LLMUnavailable as e:
+            log.warning("recommend stream falling back to local ranking: %s", e)
+            # top up whatever already went out with locally ranked picks
+            for pick in _local_fallback(prep, prefs, k=3 + len(picks)):
+                if len(picks) == 3:
+                    break
+                if pick["id"] not in seen:
+                    seen.add(pick["id"])
+                    picks.append(pick)
+                    yield _sse("pick", pick)
+            yield _sse("done", {"source": "local"})
+            return
+
+        prompt_metrics.record(
+            estimate_tokens(prep.prompt), prep.legacy_tokens, prep.stable_prefix, time.perf_counter() - started
+        )
+        # a truncated, malformed or empty answer must not be cached (the
+        # non-stream path raises for it instead)
+        full = "".join(text)
+        try:
+            json.loads(full)
+        except ValueError:
+            yield _sse("error", {"detail": f"AI returned invalid JSON: {full[:400]}"})
+            return
+        if not picks:
+            yield _sse("error", {"detail": "AI returned no valid picks."})
+            return
+        recommend_cache.put(key, {"picks": picks})
+        yield _sse("done", {"source": "llm"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -10,3 +10,87 @@ DATABASE_URL = os.getenv(
 
 MEDIA_DIR = os.getenv("MEDIA_DIR", "media")
 BASE_URL = os.getenv("BASE_URL", "https://menuart.onrender.com")
+
+# In-process menu snapshot cache. The TTL bounds staleness when another
+# worker process handled the write (each process keeps its own cache).
+MENU_CACHE_MAX_ENTRIES = int(os.getenv("MENU_CACHE_MAX_ENTRIES", "512"))
+MENU_CACHE_TTL = float(os.getenv("MENU_CACHE_TTL", "60"))
+
+# HTTP caching for the public menu/theme endpoints (browsers revalidate with
+# the ETag; a CDN may hold a copy briefly and purge by Surrogate-Key).
+MENU_HTTP_CACHE_CONTROL = os.getenv(
+    "MENU_HTTP_CACHE_CONTROL",
+    "public, max-age=0, s-maxage=30, stale-while-revalidate=30",
+)
+
+# Media uploads are streamed to disk in chunks; anything larger is rejected with 413.
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(15 * 1024 * 1024)))
+MAX_MODEL_BYTES = int(os.getenv("MAX_MODEL_BYTES", str(100 * 1024 * 1024)))
+
+# Content-addressed media never changes under a URL, wherever it is served from
+# (/media locally, or the storage bucket once uploaded).
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Background upload of stored media to Supabase storage.
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", "6"))
+UPLOAD_RETRY_BASE_DELAY = float(os.getenv("UPLOAD_RETRY_BASE_DELAY", "1.0"))
+UPLOAD_TIMEOUT = float(os.getenv("UPLOAD_TIMEOUT", "60"))
+
+# Post-upload media processing (GLB optimization, image derivatives).
+MEDIA_PIPELINE_WORKERS = int(os.getenv("MEDIA_PIPELINE_WORKERS", "2"))
+# Off by default: without quantization the optimizer only drops unreferenced
+# data and duplicate buffer views, which clean exports (e.g. Pasta.glb) don't
+# have, so typical uploads shrink little or not at all (then they are kept as
+# uploaded). Quantization needs KHR_mesh_quantization support in every viewer.
+GLB_QUANTIZE = os.getenv("GLB_QUANTIZE", "0").lower() in ("1", "true", "yes")
+# Larger models skip optimization: it holds the whole file in memory per worker.
+GLB_OPTIMIZE_MAX_BYTES = int(os.getenv("GLB_OPTIMIZE_MAX_BYTES", str(32 * 1024 * 1024)))
+IMAGE_VARIANT_WIDTHS = [int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1024").split(",") if w.strip()]
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "78"))
+
+# Recommendation results, keyed by menu revision + normalized preferences.
+RECOMMEND_CACHE_MAX_ENTRIES = int(os.getenv("RECOMMEND_CACHE_MAX_ENTRIES", "2048"))
+RECOMMEND_CACHE_TTL = float(os.getenv("RECOMMEND_CACHE_TTL", "900"))
+
+# LLM provider for /recommend. OPENAI_BASE_URL lets tests point at a local fake.
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "8"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+# LLM prompt shaping: top-K pre-ranked candidates within a token budget. By
+# default MENU lists only those candidates; PROMPT_SHARED_MENU_BLOCK=1 sends the
+# whole available menu instead (byte-identical per revision, so providers can
+# prefix-cache it) when it fits the same candidate token budget.
+RECOMMEND_TOP_K = int(os.getenv("RECOMMEND_TOP_K", "20"))
+PROMPT_CANDIDATE_TOKEN_BUDGET = int(os.getenv("PROMPT_CANDIDATE_TOKEN_BUDGET", "2500"))
+PROMPT_SHARED_MENU_BLOCK = os.getenv("PROMPT_SHARED_MENU_BLOCK", "0").lower() in ("1", "true", "yes")
+PROMPT_DESCRIPTION_CHARS = int(os.getenv("PROMPT_DESCRIPTION_CHARS", "140"))
+
+# Batch recommendations (one request for a whole table of diners).
+RECOMMEND_BATCH_MAX_PROFILES = int(os.getenv("RECOMMEND_BATCH_MAX_PROFILES", "20"))
+RECOMMEND_BATCH_CONCURRENCY = int(os.getenv("RECOMMEND_BATCH_CONCURRENCY", "4"))
+
+# Bulk menu import/export.
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(10 * 1024 * 1024)))
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "20000"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+# Per-restaurant category/subcategory name -> id cache (filled after commit).
+TAXONOMY_CACHE_MAX_ENTRIES = int(os.getenv("TAXONOMY_CACHE_MAX_ENTRIES", "1024"))
+TAXONOMY_CACHE_TTL = float(os.getenv("TAXONOMY_CACHE_TTL", "600"))
+
+# SQLAlchemy connection pool. DB_POOLER_MODE=transaction is for PgBouncer /
+# Supavisor transaction pooling (e.g. Supabase port 6543): no server-side
+# prepared statements and no session-level settings. "auto" picks it on 6543.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+DB_POOLER_MODE = os.getenv("DB_POOLER_MODE", "auto").lower()
@@ -1,13 +1,21 @@
 import os
+from typing import TYPE_CHECKING, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from app.core.base import Base  # noqa: F401 (used by Alembic target_metadata elsewhere)
+from app.core.db_pool import engine_options, instrument
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set. Check backend/.env")
 
-engine = create_engine(DATABASE_URL, future=True)
+engine = create_engine(DATABASE_URL, future=True, **engine_options(DATABASE_URL))
+instrument(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -17,3 +25,50 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ---------- Async (read-heavy endpoints) ----------
+# Same database through an asyncio driver: asyncpg for Postgres, aiosqlite
+# for SQLite. Built (and sqlalchemy.ext.asyncio imported) on first use so the
+# sync-only tools (Alembic, seed.py) don't need greenlet or the async drivers.
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+_async_engine: Optional["AsyncEngine"] = None
+_async_sessions: Optional["async_sessionmaker"] = None
+
+
+def async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"No async driver configured for {url.get_backend_name()}")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def get_async_engine() -> "AsyncEngine":
+    global _async_engine, _async_sessions
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = async_database_url(DATABASE_URL)
+        _async_engine = create_async_engine(url, **engine_options(url, is_async=True))
+        instrument(_async_engine)
+        _async_sessions = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def started_async_engine() -> Optional["AsyncEngine"]:
+    return _async_engine
+
+
+async def get_async_db():
+    get_async_engine()
+    async with _async_sessions() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessions
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_sessions = None
@@ -0,0 +1,165 @@
+import threading
+import time
+from uuid import uuid4
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_POOLER_MODE,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+
+
+class PoolMetrics:
+    """Checkout wait times plus connection lifecycle counters for one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.timeouts += int(timed_out)
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "avgWaitMs": round(1000 * self.wait_total / (self.checkouts or 1), 2),
+                "maxWaitMs": round(1000 * self.wait_max, 2),
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+            }
+
+
+class _TimedCheckout:
+    """Pool mixin that times every checkout (including waits for a free slot)."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return conn
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def transaction_pooler(url: URL) -> bool:
+    if DB_POOLER_MODE in ("transaction", "session"):
+        return DB_POOLER_MODE == "transaction"
+    return url.get_backend_name() == "postgresql" and url.port == 6543
+
+
+def engine_options(database_url: str, is_async: bool = False) -> dict:
+    """create_engine()/create_async_engine() keyword arguments for the configured pool and driver."""
+    url = make_url(database_url)
+    if url.get_backend_name() != "postgresql":
+        # SQLite & co. keep SQLAlchemy's dialect-appropriate default pool
+        return {"pool_pre_ping": DB_POOL_PRE_PING}
+
+    connect_args = {}
+    if transaction_pooler(url):
+        if url.get_driver_name() == "psycopg":
+            connect_args["prepare_threshold"] = None        # no server-side prepared statements
+        elif url.get_driver_name() == "asyncpg":
+            # asyncpg's own cache off, plus SQLAlchemy's dialect-level cache
+            # off and unique statement names, so two clients multiplexed onto
+            # one server connection never collide on a prepared statement
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = _unique_statement_name
+    elif DB_STATEMENT_TIMEOUT_MS:
+        # session pooling/direct: set once per connection at startup
+        if url.get_driver_name() == "asyncpg":
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+def instrument(engine: Engine) -> None:
+    """Connection lifecycle counters, plus per-transaction timeouts in pooler mode."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    def count(counter: str) -> None:
+        # looked up per event: engine.dispose() swaps in a fresh pool
+        metrics = getattr(sync_engine.pool, "metrics", None)
+        if metrics is not None:
+            metrics.count(counter)
+
+    event.listen(sync_engine, "connect", lambda *a: count("connects"))
+    event.listen(sync_engine, "invalidate", lambda *a: count("invalidations"))
+
+    url = sync_engine.url
+    if url.get_backend_name() == "postgresql" and DB_STATEMENT_TIMEOUT_MS:
+        if transaction_pooler(url):
+            # the pooler may hand the next transaction another server
+            # connection, so the timeout is scoped to each transaction
+            @event.listens_for(sync_engine, "begin")
+            def _statement_timeout(conn):
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {DB_STATEMENT_TIMEOUT_MS}")
+
+
+def pool_stats(engine: Engine) -> dict:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    pool = sync_engine.pool
+    out = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        out.update(
+            size=pool.size(),
+            checkedIn=pool.checkedin(),
+            checkedOut=pool.checkedout(),
+            overflow=max(0, pool.overflow()),
+            maxOverflow=DB_MAX_OVERFLOW,
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        out.update(metrics.stats())
+    return out
@@ -0,0 +1,70 @@
+import re
+from typing import Iterable, Optional
+
+# Bit flags stored in MenuItem.diet_tags
+LACTOSE = 1 << 0
+GLUTEN = 1 << 1
+CHICKEN = 1 << 2
+BEEF = 1 << 3
+SEAFOOD = 1 << 4
+
+# Keyword heuristics per tag. Matching is plain substring, case-insensitive
+# (e.g. "bun" also hits "bunch"), same as the original per-request scans.
+VOCABULARY: dict[int, list[str]] = {
+    LACTOSE: [
+        "cheese", "mozzarella", "cheddar", "parmesan", "cream", "milk", "butter",
+        "yogurt", "ice cream", "dairy", "alfredo", "bechamel", "lactose",
+    ],
+    GLUTEN: [
+        "bread", "bun", "pizza", "pasta", "noodles", "flour", "wheat",
+        "wrap", "tortilla", "breadcrumbs", "cracker", "burger bun",
+    ],
+    CHICKEN: ["chicken", "tender", "nugget", "wings"],
+    BEEF: ["beef", "burger", "steak", "brisket", "veal"],
+    SEAFOOD: ["fish", "salmon", "tuna", "shrimp", "prawn", "crab", "lobster", "seafood"],
+}
+
+ALLERGENS = {"lactose": LACTOSE, "gluten": GLUTEN}
+PROTEINS = {"chicken": CHICKEN, "beef": BEEF, "seafood": SEAFOOD}
+
+
+def _compile(vocabulary: dict[int, list[str]]) -> tuple[re.Pattern, dict[str, int]]:
+    words = {w for ws in vocabulary.values() for w in ws}
+    # A word's bits include every vocabulary word it contains: the regex takes
+    # the longest match at each position, and "burger bun" must still count as "burger".
+    bits = {
+        w: sum({tag for tag, ws in vocabulary.items() if any(o in w for o in ws)})
+        for w in words
+    }
+    alternation = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+    # zero-width lookahead so overlapping matches at every offset are seen
+    return re.compile(f"(?=({alternation}))"), bits
+
+
+_MATCHER, _WORD_BITS = _compile(VOCABULARY)
+
+
+def compute_tags(name: Optional[str], description: Optional[str]) -> int:
+    """All tag bits whose keywords occur in the item's name or description."""
+    text = f"{name or ''} {description or ''}".lower()
+    tags = 0
+    for m in _MATCHER.finditer(text):
+        tags |= _WORD_BITS[m.group(1)]
+    return tags
+
+
+def hard_filter_masks(allergies: Optional[Iterable[str]], preference: Optional[str]) -> tuple[int, int]:
+    """
+    (exclude, require) masks for the recommend hard filters: an item passes if
+    ``tags & exclude == 0`` and, when ``require`` is set, ``tags & require != 0``.
+    Unknown allergies/preferences don't filter.
+    """
+    exclude = 0
+    for a in allergies or []:
+        exclude |= ALLERGENS.get(str(a).lower().strip(), 0)
+    require = PROTEINS.get(str(preference).lower().strip(), 0) if preference else 0
+    return exclude, require
+
+
+def passes(tags: int, exclude: int, require: int) -> bool:
+    return not (tags & exclude) and (not require or bool(tags & require))
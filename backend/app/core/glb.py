@@ -0,0 +1,349 @@
+import json
+import struct
+from typing import Any, BinaryIO, Iterator, Optional, Sequence, Union
+
+GLB_MAGIC = b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+FLOAT = 5126
+BYTE = 5120
+UNSIGNED_SHORT = 5123
+
+NUM_COMPONENTS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+# Extensions whose accessor/bufferView references are all known to the walkers
+# below. Anything else (meshopt streams, animation pointers, ...) may hold
+# indices we'd fail to remap, so such files are left alone.
+SUPPORTED_EXTENSIONS = {
+    "EXT_mesh_gpu_instancing",
+    "EXT_texture_avif",
+    "EXT_texture_webp",
+    "KHR_draco_mesh_compression",
+    "KHR_lights_punctual",
+    "KHR_materials_anisotropy",
+    "KHR_materials_clearcoat",
+    "KHR_materials_dispersion",
+    "KHR_materials_emissive_strength",
+    "KHR_materials_ior",
+    "KHR_materials_iridescence",
+    "KHR_materials_pbrSpecularGlossiness",
+    "KHR_materials_sheen",
+    "KHR_materials_specular",
+    "KHR_materials_transmission",
+    "KHR_materials_unlit",
+    "KHR_materials_variants",
+    "KHR_materials_volume",
+    "KHR_mesh_quantization",
+    "KHR_texture_basisu",
+    "KHR_texture_transform",
+}
+
+Buffer = Union[bytes, memoryview]
+
+
+class GLBError(ValueError):
+    pass
+
+
+def _pad4(data: bytes, fill: bytes = b"\x00") -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+def parse_glb(data: Buffer) -> tuple[dict, memoryview]:
+    """JSON document plus the BIN chunk as a zero-copy view into ``data``."""
+    data = memoryview(data).toreadonly()  # readonly views are hashable (dedupe keys)
+    if len(data) < 20 or data[:4] != GLB_MAGIC:
+        raise GLBError("not a binary glTF file")
+    _, version, length = struct.unpack_from("<4sII", data, 0)
+    if version != 2:
+        raise GLBError(f"unsupported glTF version {version}")
+    offset = 12
+    doc = None
+    bin_chunk = data[:0]
+    while offset + 8 <= min(length, len(data)):
+        chunk_len, chunk_type = struct.unpack_from("<II", data, offset)
+        chunk = data[offset + 8: offset + 8 + chunk_len]
+        if chunk_type == CHUNK_JSON and doc is None:
+            doc = json.loads(str(chunk, "utf-8"))
+        elif chunk_type == CHUNK_BIN and not bin_chunk:
+            bin_chunk = chunk
+        offset += 8 + chunk_len
+    if doc is None:
+        raise GLBError("missing JSON chunk")
+    return doc, bin_chunk
+
+
+def write_glb(out: BinaryIO, doc: dict, bin_parts: Sequence[Buffer] = ()) -> int:
+    """
+    Stream a GLB to ``out``; the BIN chunk is ``bin_parts`` back to back, each
+    part zero-padded to 4 bytes (matching the byteOffsets optimize_glb lays
+    out). Returns the number of bytes written.
+    """
+    json_bytes = _pad4(json.dumps(doc, separators=(",", ":")).encode("utf-8"), b" ")
+    bin_len = sum(len(p) + -len(p) % 4 for p in bin_parts)
+    total = 12 + 8 + len(json_bytes) + (8 + bin_len if bin_len else 0)
+    out.write(struct.pack("<4sII", GLB_MAGIC, 2, total))
+    out.write(struct.pack("<II", len(json_bytes), CHUNK_JSON))
+    out.write(json_bytes)
+    if bin_len:
+        out.write(struct.pack("<II", bin_len, CHUNK_BIN))
+        for part in bin_parts:
+            out.write(part)
+            out.write(b"\x00" * (-len(part) % 4))
+    return total
+
+
+# ---------- reference walking ----------
+def _walk(obj: Any) -> Iterator[dict]:
+    if isinstance(obj, dict):
+        yield obj
+        for v in obj.values():
+            yield from _walk(v)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from _walk(v)
+
+
+def _primitives(doc: dict) -> Iterator[dict]:
+    for mesh in doc.get("meshes", []):
+        yield from mesh.get("primitives", [])
+
+
+def _remap_list(items: list, keep: list[int]) -> tuple[list, dict[int, int]]:
+    mapping = {old: new for new, old in enumerate(keep)}
+    return [items[i] for i in keep], mapping
+
+
+def _prune_nodes(doc: dict) -> None:
+    nodes = doc.get("nodes", [])
+    if not nodes or not doc.get("scenes"):
+        return
+    used: set[int] = set()
+    stack = [n for scene in doc["scenes"] for n in scene.get("nodes", [])]
+    for skin in doc.get("skins", []):
+        stack += skin.get("joints", [])
+        if "skeleton" in skin:
+            stack.append(skin["skeleton"])
+    for anim in doc.get("animations", []):
+        stack += [c["target"]["node"] for c in anim.get("channels", []) if "node" in c.get("target", {})]
+    while stack:
+        n = stack.pop()
+        if n in used or n >= len(nodes):
+            continue
+        used.add(n)
+        stack += nodes[n].get("children", [])
+
+    if len(used) == len(nodes):
+        return
+    doc["nodes"], m = _remap_list(nodes, sorted(used))
+    for node in doc["nodes"]:
+        if "children" in node:
+            node["children"] = [m[c] for c in node["children"] if c in m]
+    for scene in doc["scenes"]:
+        scene["nodes"] = [m[n] for n in scene.get("nodes", []) if n in m]
+    for skin in doc.get("skins", []):
+        skin["joints"] = [m[j] for j in skin.get("joints", [])]
+        if "skeleton" in skin:
+            skin["skeleton"] = m[skin["skeleton"]]
+    for anim in doc.get("animations", []):
+        for c in anim.get("channels", []):
+            if "node" in c.get("target", {}):
+                c["target"]["node"] = m[c["target"]["node"]]
+
+
+def _prune_meshes(doc: dict) -> None:
+    meshes = doc.get("meshes", [])
+    if not meshes or "nodes" not in doc:
+        return
+    used = sorted({n["mesh"] for n in doc["nodes"] if "mesh" in n})
+    if len(used) == len(meshes):
+        return
+    doc["meshes"], m = _remap_list(meshes, used)
+    for node in doc["nodes"]:
+        if "mesh" in node:
+            node["mesh"] = m[node["mesh"]]
+
+
+def _accessor_refs(doc: dict) -> Iterator[tuple[dict, str]]:
+    """(container, key) pairs whose value is an accessor index."""
+    for prim in _primitives(doc):
+        for k in prim.get("attributes", {}):
+            yield prim["attributes"], k
+        if "indices" in prim:
+            yield prim, "indices"
+        for target in prim.get("targets", []):
+            for k in target:
+                yield target, k
+    for skin in doc.get("skins", []):
+        if "inverseBindMatrices" in skin:
+            yield skin, "inverseBindMatrices"
+    for anim in doc.get("animations", []):
+        for sampler in anim.get("samplers", []):
+            yield sampler, "input"
+            yield sampler, "output"
+    for node in doc.get("nodes", []):
+        instancing = node.get("extensions", {}).get("EXT_mesh_gpu_instancing", {})
+        for k in instancing.get("attributes", {}):
+            yield instancing["attributes"], k
+
+
+def _prune_accessors(doc: dict) -> None:
+    accessors = doc.get("accessors", [])
+    if not accessors:
+        return
+    refs = list(_accessor_refs(doc))
+    used = sorted({c[k] for c, k in refs})
+    if len(used) == len(accessors):
+        return
+    doc["accessors"], m = _remap_list(accessors, used)
+    for c, k in refs:
+        c[k] = m[c[k]]
+
+
+def _buffer_view_refs(doc: dict) -> list[dict]:
+    """Every object holding a ``bufferView`` key (accessors, sparse, images, extensions)."""
+    skip = id(doc.get("bufferViews"))
+    out = []
+    for key, value in doc.items():
+        if key == "bufferViews" or id(value) == skip:
+            continue
+        out += [o for o in _walk(value) if isinstance(o.get("bufferView"), int)]
+    return out
+
+
+# ---------- quantization ----------
+def _iter_floats(doc: dict, views: list[Buffer], acc: dict) -> Iterator[tuple[float, ...]]:
+    n = NUM_COMPONENTS[acc["type"]]
+    view = doc["bufferViews"][acc["bufferView"]]
+    stride = view.get("byteStride") or 4 * n
+    data = views[acc["bufferView"]]
+    base = acc.get("byteOffset", 0)
+    fmt = struct.Struct(f"<{n}f")
+    for i in range(acc["count"]):
+        yield fmt.unpack_from(data, base + i * stride)
+
+
+def _quantize(doc: dict, views: list[Buffer]) -> bool:
+    """
+    KHR_mesh_quantization for attributes that need no node transform changes:
+    NORMAL -> normalized BYTE, TEXCOORD_n in [0, 1] -> normalized UNSIGNED_SHORT.
+    Returns True if anything was quantized.
+    """
+    semantic: dict[int, set[str]] = {}
+    for prim in _primitives(doc):
+        for name, idx in prim.get("attributes", {}).items():
+            semantic.setdefault(idx, set()).add("TEXCOORD" if name.startswith("TEXCOORD_") else name)
+    attribute_maps = {id(p["attributes"]) for p in _primitives(doc) if "attributes" in p}
+    for c, k in _accessor_refs(doc):
+        if id(c) not in attribute_maps:
+            semantic.setdefault(c[k], set()).add("OTHER")
+
+    changed = False
+    for idx, sems in semantic.items():
+        if len(sems) != 1:
+            continue
+        acc = doc["accessors"][idx]
+        if acc.get("componentType") != FLOAT or "sparse" in acc or "bufferView" not in acc:
+            continue
+        (sem,) = sems
+        # both encodings are 4 bytes per element, written in place (no per-vertex lists)
+        packed = bytearray(4 * acc["count"])
+        if sem == "NORMAL" and acc["type"] == "VEC3":
+            fmt = struct.Struct("<3bx")
+            for i, v in enumerate(_iter_floats(doc, views, acc)):
+                fmt.pack_into(packed, 4 * i, *(round(max(-1.0, min(1.0, c)) * 127) for c in v))
+            stride, ctype = 4, BYTE
+        elif sem == "TEXCOORD" and acc["type"] == "VEC2":
+            if any(c < 0.0 or c > 1.0 for v in _iter_floats(doc, views, acc) for c in v):
+                continue
+            fmt = struct.Struct("<2H")
+            for i, v in enumerate(_iter_floats(doc, views, acc)):
+                fmt.pack_into(packed, 4 * i, *(round(c * 65535) for c in v))
+            stride, ctype = 4, UNSIGNED_SHORT
+        else:
+            continue
+
+        views.append(bytes(packed))
+        doc["bufferViews"].append({"buffer": 0, "byteLength": len(packed), "byteStride": stride, "target": 34962})
+        acc.update(bufferView=len(doc["bufferViews"]) - 1, byteOffset=0, componentType=ctype, normalized=True)
+        acc.pop("min", None)
+        acc.pop("max", None)
+        changed = True
+
+    if changed:
+        for key in ("extensionsUsed", "extensionsRequired"):
+            exts = doc.setdefault(key, [])
+            if "KHR_mesh_quantization" not in exts:
+                exts.append("KHR_mesh_quantization")
+    return changed
+
+
+# ---------- entry point ----------
+def optimize_glb(data: Buffer, out: BinaryIO, quantize: bool = False) -> Optional[int]:
+    """
+    Write a smaller, equivalent GLB to ``out``: unreachable nodes, unused
+    meshes, accessors, buffer views and buffers are dropped, byte-identical
+    buffer views are merged, and the binary chunk is repacked. With
+    ``quantize``, normals and texture coordinates are stored via
+    KHR_mesh_quantization. Returns the number of bytes written.
+
+    Buffer views are memoryview slices of ``data`` streamed straight to
+    ``out``, so memory use stays close to the input size.
+
+    Files this can't safely rewrite (external buffers, extensions outside
+    SUPPORTED_EXTENSIONS) get None and nothing is written.
+    """
+    doc, bin_chunk = parse_glb(data)
+    if set(doc.get("extensionsUsed", [])) - SUPPORTED_EXTENSIONS:
+        return None
+    buffers = doc.get("buffers", [])
+    views_meta = doc.get("bufferViews", [])
+    if any(v.get("buffer", 0) != 0 for v in views_meta) or (buffers and "uri" in buffers[0]):
+        return None
+
+    views = []
+    for v in views_meta:
+        start = v.get("byteOffset", 0)
+        views.append(bin_chunk[start: start + v["byteLength"]])
+
+    _prune_nodes(doc)
+    _prune_meshes(doc)
+    _prune_accessors(doc)
+    if quantize:
+        _quantize(doc, views)
+
+    # buffer views: keep the referenced ones, folding byte-identical duplicates
+    refs = _buffer_view_refs(doc)
+    canonical: dict[tuple, int] = {}
+    keep: list[int] = []
+    remap: dict[int, int] = {}
+    for old in sorted({o["bufferView"] for o in refs}):
+        meta = doc["bufferViews"][old]
+        key = (views[old], meta.get("byteStride"), meta.get("target"))
+        if key not in canonical:
+            canonical[key] = len(keep)
+            keep.append(old)
+        remap[old] = canonical[key]
+    for o in refs:
+        o["bufferView"] = remap[o["bufferView"]]
+
+    # lay out the kept views 4-byte aligned; write_glb streams them in this order
+    parts = [views[old] for old in keep]
+    offset = 0
+    new_views = []
+    for old, part in zip(keep, parts):
+        meta = dict(doc["bufferViews"][old])
+        meta.update(buffer=0, byteOffset=offset, byteLength=len(part))
+        offset += len(part) + -len(part) % 4
+        new_views.append(meta)
+
+    if new_views:
+        doc["bufferViews"] = new_views
+        buffer = dict(buffers[0]) if buffers else {}
+        buffer["byteLength"] = new_views[-1]["byteOffset"] + new_views[-1]["byteLength"]
+        doc["buffers"] = [buffer]
+    else:
+        doc.pop("bufferViews", None)
+        doc.pop("buffers", None)
+    return write_glb(out, doc, parts)
@@ -0,0 +1,44 @@
+from fastapi import Request, Response
+
+from app.core.config import MENU_HTTP_CACHE_CONTROL
+
+
+def revision_etag(kind: str, restaurant_id: int, revision: int) -> str:
+    # strong validator: the revision moves on every write, so equal tags mean equal bytes
+    return f'"{kind}-{restaurant_id}-{revision}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: str, surrogate_keys: list[str]) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": MENU_HTTP_CACHE_CONTROL,
+        "Surrogate-Key": " ".join(surrogate_keys),
+    }
+
+
+def conditional(request: Request, response: Response, etag: str, surrogate_keys: list[str]) -> Response | None:
+    """
+    Apply validator/cache headers to ``response``. Returns a 304 response when
+    the client already holds ``etag``, otherwise None.
+    """
+    headers = cache_headers(etag, surrogate_keys)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
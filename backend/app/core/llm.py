@@ -0,0 +1,213 @@
+import asyncio
+import os
+import threading
+import time
+from typing import AsyncIterator, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.core.config import (
+    LLM_BREAKER_FAILURES,
+    LLM_BREAKER_RESET,
+    LLM_MAX_CONCURRENCY,
+    LLM_TIMEOUT,
+    OPENAI_BASE_URL,
+    OPENAI_MODEL,
+)
+
+
+class LLMNotConfigured(Exception):
+    pass
+
+
+class LLMUnavailable(Exception):
+    """The provider timed out, failed, or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after ``failure_threshold`` consecutive failures; after
+    ``reset_timeout`` seconds one trial call is let through (half-open) and
+    its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """The call was abandoned (cancelled) without an outcome: free the trial slot."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "consecutiveFailures": self._failures, "rejected": self.rejected}
+
+
+class LLMClient:
+    """
+    One long-lived AsyncOpenAI client per process: pooled connections, a
+    per-call deadline (including time spent queued), a global concurrency
+    cap and a circuit breaker.
+    """
+
+    def __init__(
+        self,
+        model: str = OPENAI_MODEL,
+        base_url: Optional[str] = OPENAI_BASE_URL,
+        timeout: float = LLM_TIMEOUT,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.model = model
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.breaker = breaker or CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET)
+        self._client: Optional[AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.calls = 0
+        self.failures = 0
+
+    def _get_client(self) -> AsyncOpenAI:
+        if self._client is None:
+            key = os.getenv("OPENAI_API_KEY")
+            if not key:
+                raise LLMNotConfigured("OPENAI_API_KEY not set in backend/.env")
+            self._client = AsyncOpenAI(
+                api_key=key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0,  # the breaker + local fallback handle failures
+                http_client=httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_concurrency,
+                        max_keepalive_connections=self.max_concurrency,
+                    ),
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def complete(self, prompt: str) -> str:
+        client = self._get_client()
+        if not self.breaker.allow():
+            raise LLMUnavailable("circuit open")
+        self.calls += 1
+
+        async def call():
+            async with self._semaphore:
+                return await client.responses.create(model=self.model, input=prompt)
+
+        try:
+            resp = await asyncio.wait_for(call(), self.timeout)
+            text = (getattr(resp, "output_text", "") or "").strip()
+        except Exception as e:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise LLMUnavailable(str(e) or type(e).__name__) from e
+        except BaseException:
+            # cancelled (client disconnect / shutdown): says nothing about the
+            # provider, but a half-open trial must not stay in flight forever
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Yield output text deltas as the provider produces them. The deadline
+        covers the whole stream; any failure (including mid-stream) raises
+        LLMUnavailable and counts against the breaker.
+        """
+        client = self._get_client()
+        if not self.breaker.allow():
+            raise LLMUnavailable("circuit open")
+        self.calls += 1
+        deadline = time.monotonic() + self.timeout
+
+        received = False
+        events = None
+        async with self._semaphore:
+            try:
+                events = await asyncio.wait_for(
+                    client.responses.create(model=self.model, input=prompt, stream=True), self.timeout
+                )
+                it = events.__aiter__()
+                while True:
+                    try:
+                        event = await asyncio.wait_for(it.__anext__(), max(0.0, deadline - time.monotonic()))
+                    except StopAsyncIteration:
+                        break
+                    if getattr(event, "type", "") == "response.output_text.delta":
+                        received = True
+                        yield event.delta
+                    elif getattr(event, "type", "") in ("response.failed", "error"):
+                        raise RuntimeError(getattr(event, "message", None) or event.type)
+            except Exception as e:
+                self.failures += 1
+                self.breaker.record_failure()
+                raise LLMUnavailable(str(e) or type(e).__name__) from e
+            except BaseException:
+                # consumer went away (client disconnect / cancellation): the
+                # provider was answering if any text had arrived
+                if received:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+                raise
+            finally:
+                if events is not None:
+                    await events.close()
+        self.breaker.record_success()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "failures": self.failures, "breaker": self.breaker.stats()}
+
+
+llm = LLMClient()
@@ -0,0 +1,157 @@
+import re
+from array import array
+from typing import Awaitable, Callable, Optional, Sequence
+
+from app.core.cache import LRUCache
+from app.core.dietary import passes
+from app.core.menu_queries import MenuRow
+
+_WORD = re.compile(r"[a-z]+")
+
+# Feature dimensions and the words that light them up. Preference, mood and
+# diet values from RecommendIn map onto these names.
+FEATURES: dict[str, list[str]] = {
+    "chicken": ["chicken", "tender", "tenders", "nugget", "nuggets", "wings"],
+    "beef": ["beef", "burger", "steak", "brisket", "veal"],
+    "seafood": ["fish", "salmon", "tuna", "shrimp", "prawn", "prawns", "crab", "lobster", "seafood"],
+    "spicy": ["spicy", "chili", "chilli", "jalapeno", "hot", "pepper", "sriracha", "harissa", "curry", "buffalo"],
+    "mild": ["mild", "creamy", "classic", "plain", "butter", "garlic", "herb"],
+    "vegan": ["vegan", "plant", "tofu", "vegetable", "vegetables", "veggie", "salad"],
+    "vegetarian": ["vegetarian", "veggie", "vegetable", "vegetables", "cheese", "mushroom", "salad", "margherita"],
+    "halal": ["halal"],
+    "light": ["salad", "grilled", "light", "fresh", "soup", "steamed"],
+    "hearty": ["burger", "fries", "loaded", "double", "bbq", "fried", "pasta"],
+    "sweet": ["dessert", "cake", "chocolate", "sweet", "ice", "cream", "pie", "cookie"],
+}
+FEATURE_NAMES = list(FEATURES)
+DIM = len(FEATURE_NAMES)
+_WORD_TO_DIMS: dict[str, list[int]] = {}
+for _d, _name in enumerate(FEATURE_NAMES):
+    for _w in FEATURES[_name]:
+        _WORD_TO_DIMS.setdefault(_w, []).append(_d)
+
+# where a word was found -> weight of the hit
+FIELD_WEIGHTS = (("name", 1.0), ("category", 0.8), ("subcategory", 0.8), ("description", 0.6))
+
+
+def _vectorize(row: MenuRow, out: array, base: int) -> None:
+    for field, weight in FIELD_WEIGHTS:
+        text = getattr(row, field) or ""
+        for word in _WORD.findall(text.lower()):
+            for d in _WORD_TO_DIMS.get(word, ()):
+                if out[base + d] < weight:
+                    out[base + d] = weight
+
+
+class FeatureIndex:
+    """
+    Precomputed per-item feature vectors for one menu revision, stored as a
+    flat row-major float array (n items x DIM) plus parallel id/price/tag arrays.
+    """
+
+    def __init__(self, rows: Sequence[MenuRow]):
+        self.rows = list(rows)
+        n = len(self.rows)
+        self.ids = array("q", (r.id for r in self.rows))
+        self.prices = array("d", (float(r.price) for r in self.rows))
+        self.tags = array("q", (r.diet_tags or 0 for r in self.rows))
+        self.vectors = array("f", bytes(4 * n * DIM))
+        for i, row in enumerate(self.rows):
+            _vectorize(row, self.vectors, i * DIM)
+
+    def _scored(
+        self,
+        preference: Optional[str],
+        mood: Optional[str],
+        diet: Optional[str],
+        budget: Optional[float],
+        exclude: int,
+        require: int,
+    ) -> list[tuple]:
+        query = [(FEATURE_NAMES.index(w), w) for w in (preference, mood, diet) if w in FEATURES]
+        scored = []
+        for i in range(len(self.ids)):
+            if not passes(self.tags[i], exclude, require):
+                continue
+            base = i * DIM
+            score = 0.0
+            hits = []
+            for d, name in query:
+                v = self.vectors[base + d]
+                if v:
+                    score += v
+                    hits.append(name)
+            price = self.prices[i]
+            if budget:
+                # inside the budget is a small bonus; over it costs proportionally
+                score += 0.3 if price <= budget else -(price - budget) / budget
+            scored.append((score, -price if budget else 0.0, -self.ids[i], i, hits))
+
+        scored.sort(reverse=True)
+        return scored
+
+    def rank(
+        self,
+        preference: Optional[str] = None,
+        mood: Optional[str] = None,
+        diet: Optional[str] = None,
+        budget: Optional[float] = None,
+        exclude: int = 0,
+        require: int = 0,
+        k: int = 3,
+    ) -> list[dict]:
+        scored = self._scored(preference, mood, diet, budget, exclude, require)
+        return [self._pick(i, hits, budget) for _, _, _, i, hits in scored[:k]]
+
+    def ranked_rows(
+        self,
+        preference: Optional[str] = None,
+        mood: Optional[str] = None,
+        diet: Optional[str] = None,
+        budget: Optional[float] = None,
+        exclude: int = 0,
+        require: int = 0,
+    ) -> list[MenuRow]:
+        """All passing rows, best first (used to pre-rank LLM candidates)."""
+        scored = self._scored(preference, mood, diet, budget, exclude, require)
+        return [self.rows[i] for _, _, _, i, _ in scored]
+
+    def _pick(self, i: int, hits: list[str], budget: Optional[float]) -> dict:
+        row = self.rows[i]
+        parts = []
+        if hits:
+            parts.append(f"Matches your {' and '.join(hits)} preference")
+        if budget and self.prices[i] <= budget:
+            parts.append(f"fits your {budget:g} {row.currency} budget")
+        if row.category and not parts:
+            parts.append(f"A {row.category.lower()} choice that fits your filters")
+        reason = ", ".join(parts) if parts else "Fits your filters"
+        reason = reason[0].upper() + reason[1:] + "."
+        return {"id": row.id, "reason": reason[:160]}
+
+
+# (restaurant id, menu revision) -> FeatureIndex over the available items
+feature_index_cache = LRUCache(max_entries=256)
+
+
+async def index_for(
+    restaurant_id: int, revision: int, load: Callable[[], Awaitable[Sequence[MenuRow]]]
+) -> FeatureIndex:
+    key = (restaurant_id, revision)
+    index = feature_index_cache.get(key)
+    if index is None:
+        index = FeatureIndex(await load())
+        feature_index_cache.put(key, index)
+    return index
+
+
+def rank_local(
+    items: Sequence[MenuRow],
+    preference: Optional[str] = None,
+    mood: Optional[str] = None,
+    diet: Optional[str] = None,
+    budget: Optional[float] = None,
+    k: int = 3,
+) -> list[dict]:
+    """Rank already-filtered candidates (e.g. as the LLM fallback)."""
+    return FeatureIndex(items).rank(preference, mood, diet, budget, k=k)
@@ -0,0 +1,161 @@
+import mimetypes
+import os
+import stat
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import IMMUTABLE_CACHE_CONTROL, UPLOAD_CHUNK_SIZE
+from app.core.storage import COMPRESSIBLE_EXTS, SIDECARS
+
+mimetypes.add_type("model/gltf-binary", ".glb")
+mimetypes.add_type("model/gltf+json", ".gltf")
+
+ZEROCOPY = "http.response.zerocopysend"
+
+
+class MediaFileResponse(Response):
+    """
+    Sends ``length`` bytes of ``path`` from ``offset``. Uses the server's
+    zero-copy sendfile extension when offered, otherwise streams in chunks.
+    """
+
+    def __init__(self, path: str, offset: int, length: int, status_code: int, headers: dict, send_body: bool = True):
+        super().__init__(status_code=status_code, headers=headers)
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.send_body = send_body
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        if ZEROCOPY in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": ZEROCOPY,
+                    "file": f.fileno(),
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            return
+        async with await anyio.open_file(self.path, "rb") as f:
+            await f.seek(self.offset)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await f.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Single ``bytes=`` range -> (start, end inclusive). Returns None for
+    headers we ignore (multi-range, other units); raises 416 if unsatisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise ValueError
+            start, end = max(0, size - suffix), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(416, headers={"content-range": f"bytes */{size}"})
+    return start, end
+
+
+def accepted_encodings(header: str | None) -> set[str]:
+    out = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            out.add(name.strip().lower())
+    return out
+
+
+class MediaFiles(StaticFiles):
+    """
+    /media: write-once files (content-addressed, or a random legacy name),
+    so responses are cached forever. Compressible assets are served from
+    precompressed ``.br``/``.gz`` sidecars picked via Accept-Encoding, and
+    byte ranges are honoured on the identity representation.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(405)
+        if any(part.startswith(".") for part in path.replace("\\", "/").split("/")):
+            # in-flight uploads and the upload queue live in dot-directories
+            raise HTTPException(404)
+        full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+        if not stat_result or not stat.S_ISREG(stat_result.st_mode):
+            raise HTTPException(404)
+
+        request_headers = Headers(scope=scope)
+        size = stat_result.st_size
+        etag = f'"{size:x}-{int(stat_result.st_mtime):x}"'
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        headers = {
+            "content-type": media_type,
+            "cache-control": IMMUTABLE_CACHE_CONTROL,
+            "etag": etag,
+            "accept-ranges": "bytes",
+        }
+        compressible = os.path.splitext(full_path)[1].lower() in COMPRESSIBLE_EXTS
+        if compressible:
+            headers["vary"] = "Accept-Encoding"
+
+        send_body = scope["method"] == "GET"
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (not if_range or if_range.strip() == etag):
+            byte_range = parse_range(range_header, size)
+            if byte_range:
+                start, end = byte_range
+                headers["content-range"] = f"bytes {start}-{end}/{size}"
+                return MediaFileResponse(full_path, start, end - start + 1, 206, headers, send_body)
+
+        # pick the representation first so the 304 check compares the right ETag
+        serve_path, serve_size = full_path, size
+        if compressible:
+            accepted = accepted_encodings(request_headers.get("accept-encoding"))
+            for encoding, suffix in SIDECARS.items():
+                if encoding not in accepted:
+                    continue
+                try:
+                    serve_size = os.stat(full_path + suffix).st_size
+                except OSError:
+                    continue
+                serve_path = full_path + suffix
+                headers["content-encoding"] = encoding
+                headers["etag"] = f'{etag[:-1]}-{encoding}"'
+                break
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and headers["etag"] in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+            return Response(status_code=304, headers={k: v for k, v in headers.items() if k != "content-type"})
+
+        return MediaFileResponse(serve_path, 0, serve_size, 200, headers, send_body)
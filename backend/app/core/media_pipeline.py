@@ -0,0 +1,170 @@
+import base64
+import io
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    GLB_OPTIMIZE_MAX_BYTES,
+    GLB_QUANTIZE,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANT_WIDTHS,
+    MEDIA_DIR,
+    MEDIA_PIPELINE_WORKERS,
+)
+from app.core.glb import GLBError, optimize_glb
+from app.core.storage import StoredMedia, publish, write_sidecars
+from app.core.tx_hooks import run_after_commit
+
+try:  # Pillow is optional; without it images are served as uploaded
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover
+    Image = None
+    ImageOps = None
+
+log = logging.getLogger(__name__)
+
+PLACEHOLDER_WIDTH = 16
+
+_executor = ThreadPoolExecutor(max_workers=max(1, MEDIA_PIPELINE_WORKERS), thread_name_prefix="media-pipeline")
+
+
+def _run(fn: Callable[..., Any], *args: Any) -> None:
+    try:
+        fn(*args)
+    except Exception:
+        log.exception("media pipeline step %s failed", fn.__name__)
+
+
+def submit_after_commit(db: Session, fn: Callable[..., Any], *args: Any) -> None:
+    """Run ``fn(*args)`` on the pipeline pool once ``db`` commits."""
+    run_after_commit(db, _executor.submit, _run, fn, *args)
+
+
+def derived_rel_path(source_rel: str, suffix: str) -> str:
+    # derivatives are a pure function of the source bytes, so they inherit its CAS key
+    return f"{os.path.splitext(source_rel)[0]}{suffix}"
+
+
+def write_atomic(rel: str, data: bytes) -> None:
+    full = os.path.join(MEDIA_DIR, rel)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(f"{full}.part", "wb") as f:
+        f.write(data)
+    os.replace(f"{full}.part", full)
+    write_sidecars(full)
+
+
+def _set_item_media(item_id: int, guard_column, source: StoredMedia, build: Callable[[Session], dict]) -> None:
+    """
+    Update one item's derived media fields unless its source changed meanwhile.
+    The guard matches on the CAS file name, which survives the provisional ->
+    remote URL swap.
+    """
+    from app.core.db import SessionLocal
+    from app.core.menu_cache import bump_revisions
+    from app.models.menu import MenuItem
+
+    with SessionLocal() as db:
+        values = build(db)
+        row = db.execute(
+            update(MenuItem)
+            .where(
+                MenuItem.id == item_id,
+                guard_column.endswith(os.path.basename(source.rel_path), autoescape=True),
+            )
+            .values(values)
+            .returning(MenuItem.restaurant_id)
+        ).first()
+        if row:
+            bump_revisions(db, [row.restaurant_id])
+        db.commit()
+
+
+# ---------- GLB ----------
+def optimize_model(item_id: int, source: StoredMedia) -> None:
+    from app.models.menu import MenuItem
+
+    write_sidecars(os.path.join(MEDIA_DIR, source.rel_path))
+    rel = derived_rel_path(source.rel_path, ".opt.glb")
+    full = os.path.join(MEDIA_DIR, rel)
+    if not os.path.exists(full):
+        if source.size > GLB_OPTIMIZE_MAX_BYTES:
+            log.info("skipping GLB optimization for %s: %d bytes", source.rel_path, source.size)
+            return
+        with open(os.path.join(MEDIA_DIR, source.rel_path), "rb") as f:
+            data = f.read()
+        # the optimizer streams its output; only keep it if it came out smaller
+        with open(f"{full}.part", "wb") as out:
+            try:
+                size = optimize_glb(data, out, quantize=GLB_QUANTIZE)
+            except GLBError as e:
+                log.info("skipping GLB optimization for %s: %s", source.rel_path, e)
+                size = None
+        if size is None or size >= len(data):
+            # nothing to gain: don't store/upload a copy; clients keep model_url
+            os.remove(f"{full}.part")
+            if size is not None:
+                log.info("GLB optimization saved nothing for %s (%d bytes)", source.rel_path, len(data))
+            return
+        os.replace(f"{full}.part", full)
+        write_sidecars(full)
+    _set_item_media(
+        item_id,
+        MenuItem.model_url,
+        source,
+        lambda db: {"model_optimized_url": publish(db, rel, "model/gltf-binary")},
+    )
+
+
+# ---------- images ----------
+def _encode_webp(img, quality: int) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="WEBP", quality=quality, method=4)
+    return buf.getvalue()
+
+
+def image_derivatives(item_id: int, source: StoredMedia) -> None:
+    """
+    Resize a dish photo to each configured width (never upscaling) as WebP,
+    plus a tiny inline placeholder, and attach them to the item.
+    """
+    if Image is None:
+        return
+    from app.models.menu import MenuItem
+
+    with Image.open(os.path.join(MEDIA_DIR, source.rel_path)) as original:
+        img = ImageOps.exif_transpose(original)
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+    configured = sorted(set(IMAGE_VARIANT_WIDTHS))
+    widths = [w for w in configured if w < img.width]
+    if len(widths) < len(configured):
+        # a configured width is at least the original: cap it at full size instead
+        widths.append(img.width)
+
+    variants = []
+    for width in widths:
+        rel = derived_rel_path(source.rel_path, f".w{width}.webp")
+        if not os.path.exists(os.path.join(MEDIA_DIR, rel)):
+            height = max(1, round(img.height * width / img.width))
+            resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+            write_atomic(rel, _encode_webp(resized, IMAGE_VARIANT_QUALITY))
+        variants.append((rel, width))
+
+    tiny = img.resize((PLACEHOLDER_WIDTH, max(1, round(img.height * PLACEHOLDER_WIDTH / img.width))))
+    placeholder = "data:image/webp;base64," + base64.b64encode(_encode_webp(tiny, 30)).decode("ascii")
+
+    def build(db: Session) -> dict:
+        sources = [
+            {"url": publish(db, rel, "image/webp"), "width": width, "type": "image/webp"}
+            for rel, width in variants
+        ]
+        return {"image_variants": json.dumps({"placeholder": placeholder, "sources": sources})}
+
+    _set_item_media(item_id, MenuItem.image_url, source, build)
@@ -0,0 +1,78 @@
+import threading
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.config import MENU_CACHE_MAX_ENTRIES, MENU_CACHE_TTL
+from app.core.tx_hooks import run_after_commit
+from app.models.menu import Restaurant
+
+
+class MenuSnapshotCache:
+    """
+    Per-restaurant snapshot of the public menu payload.
+
+    Each slug has a version counter; writers call ``bump(slug)`` after they
+    commit. A reader grabs ``version(slug)`` *before* hitting the database and
+    hands it back to ``put`` so a snapshot built from pre-write rows is never
+    stored over a newer version.
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self._entries = LRUCache(max_entries=max_entries, ttl=ttl)
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, slug: str) -> int:
+        with self._lock:
+            return self._versions.get(slug, 0)
+
+    def get(self, slug: str) -> Any:
+        entry = self._entries.get(slug)
+        if entry is None:
+            return None
+        version, snapshot = entry
+        if version != self.version(slug):
+            self._entries.pop(slug)
+            return None
+        return snapshot
+
+    def put(self, slug: str, version: int, snapshot: Any) -> None:
+        with self._lock:
+            if self._versions.get(slug, 0) != version:
+                return
+        self._entries.put(slug, (version, snapshot))
+
+    def bump(self, slug: str) -> int:
+        with self._lock:
+            v = self._versions.get(slug, 0) + 1
+            self._versions[slug] = v
+        self._entries.pop(slug)
+        return v
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+menu_cache = MenuSnapshotCache(MENU_CACHE_MAX_ENTRIES, ttl=MENU_CACHE_TTL)
+
+
+def bump_revisions(db: Session, restaurant_ids: Iterable[int]) -> None:
+    """
+    Move the menu revision of every restaurant in ``restaurant_ids`` (for
+    writers that don't hold the Restaurant rows) and drop their cached
+    snapshots once ``db`` commits.
+    """
+    ids = set(restaurant_ids)
+    if not ids:
+        return
+    res = db.execute(
+        update(Restaurant)
+        .where(Restaurant.id.in_(ids))
+        .values(menu_revision=Restaurant.menu_revision + 1)
+        .returning(Restaurant.slug)
+    )
+    for (slug,) in res:
+        run_after_commit(db, menu_cache.bump, slug)
@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+import math
+from typing import Any, Iterable, Iterator, Optional
+
+from app.core.dietary import compute_tags
+from app.core.menu_queries import MenuRow
+
+# Column order for CSV export; import accepts the same names in any order.
+COLUMNS = (
+    "name",
+    "description",
+    "price",
+    "currency",
+    "category",
+    "subcategory",
+    "is_available",
+    "image_url",
+    "model_url",
+)
+
+# MenuItem.price is Numeric(10, 2): anything from 1e8 up overflows the column
+MAX_PRICE = 1e8
+
+_TRUE = {"1", "true", "yes", "y", "on"}
+_FALSE = {"0", "false", "no", "n", "off"}
+
+
+class RowError(ValueError):
+    pass
+
+
+def _text(raw: dict, key: str, max_len: int, required: bool = False) -> Optional[str]:
+    value = raw.get(key)
+    value = "" if value is None else str(value).strip()
+    if not value:
+        if required:
+            raise RowError(f"{key} is required")
+        return None
+    if len(value) > max_len:
+        raise RowError(f"{key} longer than {max_len} characters")
+    return value
+
+
+def _bool(value: Any) -> bool:
+    if value is None or value == "":
+        return True
+    if isinstance(value, bool):
+        return value
+    v = str(value).strip().lower()
+    if v in _TRUE:
+        return True
+    if v in _FALSE:
+        return False
+    raise RowError(f"is_available must be true/false, got {value!r}")
+
+
+def clean_row(raw: dict) -> dict:
+    """Validate one import record -> MenuItem column values plus taxonomy names."""
+    if not isinstance(raw, dict):
+        raise RowError("expected an object")
+    name = _text(raw, "name", 120, required=True)
+    description = _text(raw, "description", 10_000) or ""
+    try:
+        price = round(float(raw.get("price")), 2)
+    except (TypeError, ValueError):
+        raise RowError("price must be a number")
+    if not math.isfinite(price):
+        raise RowError("price must be a finite number")
+    if price < 0:
+        raise RowError("price must not be negative")
+    if price >= MAX_PRICE:
+        raise RowError(f"price must be below {MAX_PRICE:,.0f}")
+    currency = (_text(raw, "currency", 3) or "USD").upper()
+    if len(currency) != 3 or not currency.isalpha():
+        raise RowError("currency must be a 3-letter code")
+    category = _text(raw, "category", 80)
+    subcategory = _text(raw, "subcategory", 80)
+    if subcategory and not category:
+        raise RowError("subcategory given without category")
+    return {
+        "name": name,
+        "description": description,
+        "price": price,
+        "currency": currency,
+        "category": category,
+        "subcategory": subcategory,
+        "is_available": _bool(raw.get("is_available")),
+        "image_url": _text(raw, "image_url", 500),
+        "model_url": _text(raw, "model_url", 500),
+        "diet_tags": compute_tags(name, description),
+    }
+
+
+def read_records(data: bytes, fmt: str) -> list[dict]:
+    """Decode a CSV or JSON (list, or {"items": [...]}) upload into raw records."""
+    text = data.decode("utf-8-sig")
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(text)))
+    doc = json.loads(text)
+    if isinstance(doc, dict):
+        doc = doc.get("items")
+    if not isinstance(doc, list):
+        raise ValueError('expected a JSON list or {"items": [...]}')
+    return doc
+
+
+def export_record(row: MenuRow) -> dict:
+    return {
+        "name": row.name,
+        "description": row.description or "",
+        "price": float(row.price),
+        "currency": row.currency,
+        "category": row.category,
+        "subcategory": row.subcategory,
+        "is_available": row.is_available,
+        "image_url": row.image_url,
+        "model_url": row.model_url,
+    }
+
+
+def iter_csv(rows: Iterable[MenuRow]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({k: ("" if v is None else v) for k, v in export_record(row).items()})
+        if buf.tell() > 64 * 1024:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
@@ -0,0 +1,122 @@
+import base64
+import json
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional
+
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.menu import Category, MenuItem, Subcategory
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class MenuRow(NamedTuple):
+    """Flat, read-only projection of a menu item with its taxonomy names."""
+    id: int
+    name: str
+    description: Optional[str]
+    price: float
+    currency: str
+    image_url: Optional[str]
+    model_url: Optional[str]
+    model_optimized_url: Optional[str]
+    image_variants: Optional[str]
+    is_available: bool
+    diet_tags: int
+    category: Optional[str]
+    subcategory: Optional[str]
+    category_sort: int                         # first half of the listing's sort key
+
+
+_CATEGORY_SORT = func.coalesce(Category.sort_order, 0)
+
+
+def menu_rows_stmt(
+    restaurant_id: int,
+    available_only: bool = False,
+    exclude_tags: int = 0,
+    require_tags: int = 0,
+    category: Optional[str] = None,
+    subcategory: Optional[str] = None,
+    available: Optional[bool] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    after: Optional[tuple[int, int]] = None,
+    limit: Optional[int] = None,
+    item_ids: Optional[Iterable[int]] = None,
+) -> Select:
+    """
+    One SELECT for a restaurant's whole menu: item columns plus category and
+    subcategory names via outer joins, so callers never touch lazy relationships.
+    ``exclude_tags``/``require_tags`` apply the dietary bitmask filters in SQL.
+    ``after`` is a keyset position on the (category sort_order, id) ordering.
+    """
+    stmt = (
+        select(
+            MenuItem.id,
+            MenuItem.name,
+            MenuItem.description,
+            MenuItem.price,
+            MenuItem.currency,
+            MenuItem.image_url,
+            MenuItem.model_url,
+            MenuItem.model_optimized_url,
+            MenuItem.image_variants,
+            MenuItem.is_available,
+            MenuItem.diet_tags,
+            Category.name.label("category"),
+            Subcategory.name.label("subcategory"),
+            _CATEGORY_SORT.label("category_sort"),
+        )
+        .outerjoin(Category, MenuItem.category_id == Category.id)
+        .outerjoin(Subcategory, MenuItem.subcategory_id == Subcategory.id)
+        .where(MenuItem.restaurant_id == restaurant_id)
+        .order_by(_CATEGORY_SORT, MenuItem.id)
+    )
+    if item_ids is not None:
+        stmt = stmt.where(MenuItem.id.in_(set(item_ids)))
+    if available_only:
+        stmt = stmt.where(MenuItem.is_available.is_(True))
+    if available is not None:
+        stmt = stmt.where(MenuItem.is_available.is_(available))
+    if category is not None:
+        stmt = stmt.where(Category.name == category)
+    if subcategory is not None:
+        stmt = stmt.where(Subcategory.name == subcategory)
+    if min_price is not None:
+        stmt = stmt.where(MenuItem.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(MenuItem.price <= max_price)
+    if after is not None:
+        stmt = stmt.where(tuple_(_CATEGORY_SORT, MenuItem.id) > tuple_(*after))
+    if exclude_tags:
+        stmt = stmt.where(MenuItem.diet_tags.op("&")(exclude_tags) == 0)
+    if require_tags:
+        stmt = stmt.where(MenuItem.diet_tags.op("&")(require_tags) != 0)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def load_menu_rows(db: Session, restaurant_id: int, **filters) -> list[MenuRow]:
+    return [MenuRow(*row) for row in db.execute(menu_rows_stmt(restaurant_id, **filters))]
+
+
+async def load_menu_rows_async(db: "AsyncSession", restaurant_id: int, **filters) -> list[MenuRow]:
+    return [MenuRow(*row) for row in await db.execute(menu_rows_stmt(restaurant_id, **filters))]
+
+
+# ---------- keyset cursors ----------
+def encode_cursor(row: MenuRow) -> str:
+    raw = json.dumps([row.category_sort, row.id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    """Inverse of encode_cursor; raises ValueError on anything malformed."""
+    try:
+        sort_order, item_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(sort_order), int(item_id)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
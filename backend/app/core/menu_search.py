@@ -0,0 +1,166 @@
+import re
+from typing import Optional, Sequence
+
+from sqlalchemy import Select, func, literal, literal_column, or_
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.menu_queries import MenuRow, load_menu_rows, menu_rows_stmt
+from app.models.menu import MenuItem
+
+# Weights mirror the setweight() labels of the search_vector columns
+# (name A, description B, category/subcategory C).
+FIELD_WEIGHTS = (("name", 1.0), ("description", 0.4), ("category", 0.2), ("subcategory", 0.2))
+# pg_trgm's default thresholds for the % (whole name) and <% (best-matching
+# part of the name: prefixes and typos inside longer names) operators
+TRIGRAM_THRESHOLD = 0.3
+WORD_TRIGRAM_THRESHOLD = 0.6
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+# ---------- Postgres ----------
+_ITEM_VECTOR = literal_column("menu_items.search_vector")
+_CATEGORY_VECTOR = literal_column("categories.search_vector")
+_SUBCATEGORY_VECTOR = literal_column("subcategories.search_vector")
+_EMPTY_VECTOR = literal_column("''::tsvector")
+_CONFIG = literal_column("'english'::regconfig")
+
+
+def search_stmt(restaurant_id: int, q: str, limit: int, offset: int = 0) -> Select:
+    """
+    Ranked full-text + fuzzy search over one restaurant's menu: ts_rank over
+    the item/category/subcategory vectors plus trigram similarity on the
+    item name (which also catches typos and prefixes the stemmer doesn't).
+    """
+    tsq = func.websearch_to_tsquery(_CONFIG, q)
+    document = (
+        _ITEM_VECTOR.op("||")(func.coalesce(_CATEGORY_VECTOR, _EMPTY_VECTOR))
+        .op("||")(func.coalesce(_SUBCATEGORY_VECTOR, _EMPTY_VECTOR))
+    )
+    score = func.ts_rank(document, tsq) + func.greatest(
+        func.similarity(MenuItem.name, q), func.word_similarity(q, MenuItem.name)
+    )
+    return (
+        menu_rows_stmt(restaurant_id)
+        .order_by(None)
+        .where(
+            or_(
+                _ITEM_VECTOR.op("@@")(tsq),
+                _CATEGORY_VECTOR.op("@@")(tsq),
+                _SUBCATEGORY_VECTOR.op("@@")(tsq),
+                MenuItem.name.op("%")(q),
+                literal(q).op("<%")(MenuItem.name),
+            )
+        )
+        .order_by(score.desc(), MenuItem.id)
+        .limit(limit)
+        .offset(offset)
+    )
+
+
+# ---------- Fallback (SQLite & co.) ----------
+def _stem(word: str) -> str:
+    # crude plural folding so "burgers" finds "burger"
+    if len(word) > 3 and word.endswith("es") and word[-3] in "sxz":
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _tokens(text: Optional[str]) -> list[str]:
+    return [_stem(w) for w in _WORD.findall((text or "").lower())]
+
+
+def _word_trigrams(text: str) -> list[list[str]]:
+    # pg_trgm style: each word padded with two leading and one trailing space
+    out = []
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        out.append([padded[i:i + 3] for i in range(len(padded) - 2)])
+    return out
+
+
+def _trigrams(text: str) -> set[str]:
+    return {t for word in _word_trigrams(text) for t in word}
+
+
+def _word_similarity(q_trigrams: set[str], words: list[list[str]]) -> float:
+    """
+    pg_trgm word_similarity, per word: the best Jaccard similarity between the
+    query's trigrams and any contiguous run of one word's trigrams.
+    """
+    best = 0.0
+    for word in words:
+        if q_trigrams.isdisjoint(word):
+            continue
+        for start in range(len(word)):
+            extent: set[str] = set()
+            shared = 0
+            for t in word[start:]:
+                if t in extent:
+                    continue
+                extent.add(t)
+                shared += t in q_trigrams
+                best = max(best, shared / (len(q_trigrams) + len(extent) - shared))
+    return best
+
+
+class MenuSearchIndex:
+    """
+    In-process inverted index over one menu revision, approximating the
+    Postgres ranking: weighted term hits (every query term must match some
+    field, like websearch_to_tsquery's AND) plus name trigram similarity.
+    """
+
+    def __init__(self, rows: Sequence[MenuRow]):
+        self.rows = list(rows)
+        self.postings: dict[str, dict[int, float]] = {}
+        self.name_words = [_word_trigrams(r.name) for r in self.rows]
+        self.name_trigrams = [{t for word in words for t in word} for words in self.name_words]
+        for i, row in enumerate(self.rows):
+            for field, weight in FIELD_WEIGHTS:
+                for token in _tokens(getattr(row, field)):
+                    posting = self.postings.setdefault(token, {})
+                    posting[i] = max(posting.get(i, 0.0), weight)
+
+    def search(self, q: str, limit: int, offset: int = 0) -> list[MenuRow]:
+        terms = _tokens(q)
+        scores: dict[int, float] = {}
+        if terms:
+            matched = None
+            for term in terms:
+                hits = self.postings.get(term, {})
+                matched = set(hits) if matched is None else matched & set(hits)
+            for i in matched or ():
+                scores[i] = sum(self.postings[t][i] for t in terms)
+
+        q_trigrams = _trigrams(q)
+        if q_trigrams:
+            for i, name_trigrams in enumerate(self.name_trigrams):
+                if q_trigrams.isdisjoint(name_trigrams):
+                    continue
+                sim = len(q_trigrams & name_trigrams) / len(q_trigrams | name_trigrams)
+                word_sim = _word_similarity(q_trigrams, self.name_words[i])
+                if sim >= TRIGRAM_THRESHOLD or word_sim >= WORD_TRIGRAM_THRESHOLD or i in scores:
+                    scores[i] = scores.get(i, 0.0) + max(sim, word_sim)
+
+        ranked = sorted(scores, key=lambda i: (-scores[i], self.rows[i].id))
+        return [self.rows[i] for i in ranked[offset:offset + limit]]
+
+
+# (restaurant id, menu revision) -> MenuSearchIndex
+search_index_cache = LRUCache(max_entries=256)
+
+
+def search_menu(db: Session, restaurant_id: int, revision: int, q: str, limit: int, offset: int = 0) -> list[MenuRow]:
+    if db.get_bind().dialect.name == "postgresql":
+        return [MenuRow(*row) for row in db.execute(search_stmt(restaurant_id, q, limit, offset))]
+
+    key = (restaurant_id, revision)
+    index = search_index_cache.get(key)
+    if index is None:
+        index = MenuSearchIndex(load_menu_rows(db, restaurant_id))
+        search_index_cache.put(key, index)
+    return index.search(q, limit, offset)
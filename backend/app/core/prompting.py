@@ -0,0 +1,223 @@
+import json
+import threading
+from typing import Awaitable, Callable, Optional, Sequence
+
+from app.core.cache import LRUCache
+from app.core.config import (
+    PROMPT_CANDIDATE_TOKEN_BUDGET,
+    PROMPT_DESCRIPTION_CHARS,
+    PROMPT_SHARED_MENU_BLOCK,
+    RECOMMEND_TOP_K,
+)
+from app.core.menu_queries import MenuRow
+
+# Fixed text first, then MENU, then per-diner data. With the shared MENU block
+# everything up to CANDIDATES is byte-identical for every diner of a menu.
+INSTRUCTIONS = (
+    "You are a restaurant menu recommender.\n"
+    "Rules:\n"
+    "- Only recommend items whose id is listed in CANDIDATES. MENU gives item details (one JSON object per line).\n"
+    "- CANDIDATES were already filtered for allergies and protein preference, best matches first. Do not violate constraints.\n"
+    "- Return UP TO 3 DIFFERENT items (unique IDs). If fewer items exist, return fewer.\n"
+    "- IDs must be UNIQUE. Never repeat the same id.\n"
+    "- Return STRICT JSON ONLY with this exact shape:\n"
+    '  {"picks":[{"id":<int>,"reason":"<short>"}]}\n'
+    "- No extra text, no markdown.\n"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English/JSON; good enough for budgeting
+    return (len(text) + 3) // 4
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def _truncate(text: Optional[str], limit: int) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def item_line(row: MenuRow) -> str:
+    return _dumps({
+        "id": row.id,
+        "name": row.name,
+        "description": _truncate(row.description, PROMPT_DESCRIPTION_CHARS),
+        "price": float(row.price),
+        "currency": row.currency,
+        "category": row.category,
+        "subcategory": row.subcategory,
+    })
+
+
+# (restaurant id, menu revision) -> MENU block text, or "" if over budget
+menu_block_cache = LRUCache(max_entries=256)
+
+
+async def menu_block_for(
+    restaurant_id: int,
+    revision: int,
+    load: Callable[[], Awaitable[Sequence[MenuRow]]],
+    enabled: bool = PROMPT_SHARED_MENU_BLOCK,
+    token_budget: int = PROMPT_CANDIDATE_TOKEN_BUDGET,
+) -> str:
+    """
+    Byte-stable listing of a menu revision's available items (sorted by id).
+    Empty when disabled or when the whole menu doesn't fit ``token_budget``
+    (the same budget the candidate list gets); callers then list only the
+    diner's candidates.
+    """
+    if not enabled:
+        return ""
+    key = (restaurant_id, revision, token_budget)
+    block = menu_block_cache.get(key)
+    if block is None:
+        block = "\n".join(item_line(r) for r in sorted(await load(), key=lambda r: r.id))
+        if estimate_tokens(block) > token_budget:
+            block = ""
+        menu_block_cache.put(key, block)
+    return block
+
+
+def select_candidates(
+    ranked: Sequence[MenuRow],
+    k: int = RECOMMEND_TOP_K,
+    token_budget: int = PROMPT_CANDIDATE_TOKEN_BUDGET,
+) -> list[MenuRow]:
+    """Best-first candidates, at most ``k`` and within ``token_budget`` of MENU lines."""
+    out: list[MenuRow] = []
+    used = 0
+    for row in ranked:
+        if len(out) >= k:
+            break
+        cost = estimate_tokens(item_line(row)) + 1
+        if out and used + cost > token_budget:
+            break
+        out.append(row)
+        used += cost
+    return out
+
+
+def build_prompt(menu_block: str, candidates: Sequence[MenuRow], preferences: dict) -> str:
+    menu = menu_block or "\n".join(item_line(r) for r in candidates)
+    return (
+        INSTRUCTIONS
+        + "\nMENU:\n" + menu
+        + "\n\nCANDIDATES:\n" + _dumps([r.id for r in candidates])
+        + "\n\nPREFERENCES:\n" + _dumps(preferences)
+    )
+
+
+def legacy_prompt_tokens(items: Sequence[MenuRow], preferences: dict) -> int:
+    """Size the previous builder would have sent (full menu, full descriptions)."""
+    menu = [
+        {
+            "id": it.id,
+            "name": it.name,
+            "description": it.description or "",
+            "price": float(it.price),
+            "currency": it.currency,
+            "category": it.category,
+            "subcategory": it.subcategory,
+        }
+        for it in items
+    ]
+    return estimate_tokens(INSTRUCTIONS + "\nDATA:\n" + json.dumps({"preferences": preferences, "menu": menu}, ensure_ascii=False))
+
+
+class PickStreamParser:
+    """
+    Incremental parser for ``{"picks":[{...},{...}]}``: feed text deltas and
+    get back each pick object as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self._buf: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start: Optional[int] = None
+        self._pos = 0
+
+    def feed(self, chunk: str) -> list[dict]:
+        out = []
+        for ch in chunk:
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                # outer object (1) -> picks array (2) -> pick object (3)
+                if ch == "{" and self._depth == 3:
+                    self._start = self._pos
+            elif ch in "}]":
+                if ch == "}" and self._depth == 3 and self._start is not None:
+                    try:
+                        obj = json.loads("".join(self._buf[self._start:]))
+                    except ValueError:
+                        obj = None
+                    if isinstance(obj, dict):
+                        out.append(obj)
+                    self._start = None
+                self._depth -= 1
+            self._pos += 1
+        if self._start is None and self._buf:
+            # nothing pending: drop consumed text
+            self._buf.clear()
+            self._pos = 0
+        return out
+
+
+class PromptMetrics:
+    """Running totals for prompt size (new vs. legacy builder) and LLM latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.legacy_tokens = 0
+        self.stable_prefix_calls = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.streams = 0
+        self.first_pick_total = 0.0
+
+    def record_first_pick(self, latency: float) -> None:
+        with self._lock:
+            self.streams += 1
+            self.first_pick_total += latency
+
+    def record(self, prompt_tokens: int, legacy_tokens: int, stable_prefix: bool, latency: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.legacy_tokens += legacy_tokens
+            self.stable_prefix_calls += int(stable_prefix)
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self.calls or 1
+            return {
+                "calls": self.calls,
+                "avgPromptTokens": round(self.prompt_tokens / n, 1),
+                "avgLegacyPromptTokens": round(self.legacy_tokens / n, 1),
+                "stablePrefixCalls": self.stable_prefix_calls,
+                "avgLatencyMs": round(1000 * self.latency_total / n, 1),
+                "maxLatencyMs": round(1000 * self.latency_max, 1),
+                "streams": self.streams,
+                "avgFirstPickMs": round(1000 * self.first_pick_total / (self.streams or 1), 1),
+            }
+
+
+prompt_metrics = PromptMetrics()
@@ -0,0 +1,162 @@
+import gzip
+import hashlib
+import os
+import shutil
+import uuid
+from typing import BinaryIO, NamedTuple
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    BASE_URL,
+    MAX_IMAGE_BYTES,
+    MAX_MODEL_BYTES,
+    MEDIA_DIR,
+    UPLOAD_CHUNK_SIZE,
+)
+from app.core.upload_queue import upload_queue
+
+try:  # brotli sidecars are optional; gzip ones are always written
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# kind -> (default extension, default content type, max bytes)
+MEDIA_KINDS = {
+    "image": (".jpg", "image/jpeg", MAX_IMAGE_BYTES),
+    "model": (".glb", "model/gltf-binary", MAX_MODEL_BYTES),
+}
+
+# Content-addressed layout: cas/<first two hex chars>/<sha256><ext>.
+# The same bytes always land on the same path, so repeat uploads (e.g. a chain
+# reusing one GLB across locations) are stored once and URLs are immutable.
+CAS_DIR = "cas"
+INCOMING_DIR = ".incoming"
+
+# Geometry/JSON compresses well; images are already compressed.
+COMPRESSIBLE_EXTS = {".glb", ".gltf", ".bin", ".json"}
+# Content-Encoding -> sidecar suffix, in order of preference
+SIDECARS = {"br": ".br", "gzip": ".gz"}
+# only keep a sidecar that saves at least this fraction
+SIDECAR_MIN_SAVING = 0.1
+
+
+class StoredMedia(NamedTuple):
+    url: str
+    rel_path: str
+    sha256: str
+    size: int
+
+
+def ensure_dir(path: str):
+    os.makedirs(path, exist_ok=True)
+
+
+def file_url(rel_path: str) -> str:
+    # served via MediaFiles at /media
+    return f"{BASE_URL}/media/{rel_path.replace(os.sep, '/')}"
+
+
+def cas_rel_path(sha256: str, ext: str) -> str:
+    return os.path.join(CAS_DIR, sha256[:2], f"{sha256}{ext.lower()}")
+
+
+def stream_to_file(src: BinaryIO, dest: str, max_bytes: int, label: str = "File") -> tuple[str, int]:
+    """
+    Copy ``src`` into ``dest`` in fixed-size chunks, hashing on the way.
+    Memory use is one chunk regardless of the upload size. Raises 413 (and
+    removes the partial file) once ``max_bytes`` is exceeded.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest, "wb") as out:
+            while True:
+                chunk = src.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(413, f"{label} exceeds the {max_bytes} byte limit")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        if os.path.exists(dest):
+            os.remove(dest)
+        raise
+    return digest.hexdigest(), size
+
+
+def _keep_if_smaller(original: str, sidecar: str) -> None:
+    if os.path.getsize(sidecar) > os.path.getsize(original) * (1 - SIDECAR_MIN_SAVING):
+        os.remove(sidecar)
+
+
+def write_sidecars(full: str) -> None:
+    """
+    Write precompressed ``.gz``/``.br`` copies of a compressible media file so
+    /media can serve them without compressing per request.
+    """
+    if os.path.splitext(full)[1].lower() not in COMPRESSIBLE_EXTS:
+        return
+    gz = full + SIDECARS["gzip"]
+    if not os.path.exists(gz):
+        with open(full, "rb") as src, gzip.open(f"{gz}.part", "wb", compresslevel=9) as dst:
+            shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+        os.replace(f"{gz}.part", gz)
+        _keep_if_smaller(full, gz)
+    br = full + SIDECARS["br"]
+    if brotli is not None and not os.path.exists(br):
+        compressor = brotli.Compressor(quality=9)
+        with open(full, "rb") as src, open(f"{br}.part", "wb") as dst:
+            for chunk in iter(lambda: src.read(UPLOAD_CHUNK_SIZE), b""):
+                dst.write(compressor.process(chunk))
+            dst.write(compressor.finish())
+        os.replace(f"{br}.part", br)
+        _keep_if_smaller(full, br)
+
+
+def publish(db: Session, rel: str, content_type: str) -> str:
+    """
+    URL to store for a file already in the local CAS. If remote storage is
+    configured and doesn't hold it yet, the local URL is handed out as a
+    provisional one and the upload queue swaps it once the upload lands
+    (the job is queued when ``db`` commits).
+    """
+    url = upload_queue.known_remote_url(rel)
+    if url:
+        return url
+    url = file_url(rel)
+    upload_queue.enqueue_after_commit(db, rel, content_type, url)
+    return url
+
+
+def store_upload(upload: UploadFile, kind: str, db: Session) -> StoredMedia:
+    """
+    Stream an uploaded file into the content-addressed store and queue it
+    for remote storage. Bytes that are already stored are not written again.
+    """
+    default_ext, default_type, max_bytes = MEDIA_KINDS[kind]
+    declared = getattr(upload, "size", None)
+    if declared is not None and declared > max_bytes:
+        raise HTTPException(413, f"{kind.capitalize()} exceeds the {max_bytes} byte limit")
+
+    incoming = os.path.join(MEDIA_DIR, INCOMING_DIR)
+    ensure_dir(incoming)
+    tmp = os.path.join(incoming, f"{uuid.uuid4().hex}.part")
+    sha256, size = stream_to_file(upload.file, tmp, max_bytes, kind.capitalize())
+
+    ext = os.path.splitext(upload.filename or "")[1] or default_ext
+    rel = cas_rel_path(sha256, ext)
+    full = os.path.join(MEDIA_DIR, rel)
+    try:
+        if not os.path.exists(full):
+            ensure_dir(os.path.dirname(full))
+            os.replace(tmp, full)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    url = publish(db, rel, upload.content_type or default_type)
+    return StoredMedia(url=url, rel_path=rel, sha256=sha256, size=size)
@@ -0,0 +1,115 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.config import TAXONOMY_CACHE_MAX_ENTRIES, TAXONOMY_CACHE_TTL
+from app.core.tx_hooks import run_after_commit
+from app.models.menu import Category, Subcategory
+
+TaxonomyKey = tuple[str, Optional[str]]          # (category name, subcategory name)
+TaxonomyIds = tuple[Optional[int], Optional[int]]
+
+# restaurant id -> {(category, subcategory): (category id, subcategory id)}.
+# Only committed ids go in (via run_after_commit). No write path renames or
+# deletes categories (item moves and import-with-replace leave them in place),
+# so entries never need invalidating: each restaurant's map only grows. The TTL
+# bounds staleness if rows are changed behind our back.
+taxonomy_cache = LRUCache(max_entries=TAXONOMY_CACHE_MAX_ENTRIES, ttl=TAXONOMY_CACHE_TTL)
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _remember(restaurant_id: int, resolved: dict[TaxonomyKey, TaxonomyIds]) -> None:
+    known = taxonomy_cache.get(restaurant_id) or {}
+    taxonomy_cache.put(restaurant_id, {**known, **resolved})
+
+
+def _insert_missing(db: Session, model, rows: list[dict], conflict_cols: list[str], returning: tuple) -> list:
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING where the dialect has it, so
+    a concurrent writer creating the same name is not an error; rows lost to
+    such a race return nothing and are re-read by the caller.
+    """
+    make_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if make_insert is None:
+        return db.execute(insert(model).returning(*returning), rows).all()
+    stmt = make_insert(model).on_conflict_do_nothing(index_elements=conflict_cols).returning(*returning)
+    return db.execute(stmt, rows).all()
+
+
+def resolve(db: Session, restaurant_id: int, category: str, subcategory: str = "") -> TaxonomyIds:
+    """
+    Ids for one item's category/subcategory names, creating them if needed.
+    Cache hit: no queries. Existing names: one SELECT for both levels.
+    """
+    category = (category or "").strip()
+    subcategory = (subcategory or "").strip() if category else ""
+    if not category:
+        return None, None
+    key = (category, subcategory or None)
+    ids = (taxonomy_cache.get(restaurant_id) or {}).get(key)
+    if ids is not None:
+        return ids
+
+    row = db.execute(
+        select(Category.id, Subcategory.id)
+        .outerjoin(
+            Subcategory,
+            and_(Subcategory.category_id == Category.id, Subcategory.name == subcategory),
+        )
+        .where(Category.restaurant_id == restaurant_id, Category.name == category)
+    ).first()
+    if row is None or (subcategory and row[1] is None):
+        return resolve_many(db, restaurant_id, [key])[key]
+    ids = (row[0], row[1])
+    run_after_commit(db, _remember, restaurant_id, {key: ids})
+    return ids
+
+
+def resolve_many(
+    db: Session, restaurant_id: int, keys: Iterable[TaxonomyKey]
+) -> dict[TaxonomyKey, TaxonomyIds]:
+    """
+    Map (category, subcategory) names to ids for one restaurant, creating
+    whatever is missing. One SELECT per level for existing rows and one
+    multi-row upsert per level for new ones, however many keys.
+    """
+    keys = set(keys)
+    if not keys:
+        return {}
+
+    cat_names = {c for c, _ in keys}
+    cat_query = select(Category.name, Category.id).where(
+        Category.restaurant_id == restaurant_id, Category.name.in_(cat_names)
+    )
+    cat_ids = dict(db.execute(cat_query).all())
+    missing = [{"restaurant_id": restaurant_id, "name": n} for n in sorted(cat_names - set(cat_ids))]
+    if missing:
+        cat_ids.update(_insert_missing(db, Category, missing, ["restaurant_id", "name"], (Category.name, Category.id)))
+        if len(cat_ids) < len(cat_names):
+            cat_ids.update(db.execute(cat_query).all())
+
+    sub_wanted = {(cat_ids[c], s) for c, s in keys if s}
+    sub_ids: dict[tuple[int, str], int] = {}
+    if sub_wanted:
+        sub_query = select(Subcategory.category_id, Subcategory.name, Subcategory.id).where(
+            Subcategory.category_id.in_({c for c, _ in sub_wanted}),
+            Subcategory.name.in_({s for _, s in sub_wanted}),
+        )
+        sub_ids = {(c, n): i for c, n, i in db.execute(sub_query).all()}
+        missing = [{"category_id": c, "name": n} for c, n in sorted(sub_wanted - set(sub_ids))]
+        if missing:
+            created = _insert_missing(
+                db, Subcategory, missing, ["category_id", "name"],
+                (Subcategory.category_id, Subcategory.name, Subcategory.id),
+            )
+            sub_ids.update({(c, n): i for c, n, i in created})
+            if not sub_wanted <= set(sub_ids):
+                sub_ids.update({(c, n): i for c, n, i in db.execute(sub_query).all()})
+
+    resolved = {(c, s): (cat_ids[c], sub_ids[(cat_ids[c], s)] if s else None) for c, s in keys}
+    run_after_commit(db, _remember, restaurant_id, resolved)
+    return resolved
@@ -0,0 +1,25 @@
+from typing import Any, Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_KEY = "after_commit_callbacks"
+
+
+def run_after_commit(db: Session, fn: Callable[..., Any], *args: Any) -> None:
+    """
+    Call ``fn(*args)`` once ``db`` commits (dropped on rollback). Used for
+    background work that must only see committed rows.
+    """
+    db.info.setdefault(_KEY, []).append((fn, args))
+
+
+@event.listens_for(Session, "after_commit")
+def _run_callbacks(session: Session) -> None:
+    for fn, args in session.info.pop(_KEY, []):
+        fn(*args)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_callbacks(session: Session) -> None:
+    session.info.pop(_KEY, None)
@@ -0,0 +1,392 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.parse
+from typing import Callable, Optional
+
+import httpx
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.config import (
+    IMMUTABLE_CACHE_CONTROL,
+    MEDIA_DIR,
+    UPLOAD_MAX_ATTEMPTS,
+    UPLOAD_RETRY_BASE_DELAY,
+    UPLOAD_TIMEOUT,
+    UPLOAD_WORKERS,
+)
+from app.core.tx_hooks import run_after_commit
+
+log = logging.getLogger(__name__)
+
+QUEUE_DIR = os.path.join(MEDIA_DIR, ".upload-queue")
+
+
+class StorageTarget:
+    """Supabase storage bucket endpoint (or any server speaking the same API)."""
+
+    def __init__(self, base_url: str, key: str, bucket: str):
+        self.base_url = base_url.rstrip("/")
+        self.key = key
+        self.bucket = bucket
+
+    @classmethod
+    def from_env(cls) -> Optional["StorageTarget"]:
+        base_url = os.getenv("SUPABASE_URL")
+        key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        bucket = os.getenv("SUPABASE_STORAGE_BUCKET")
+        if not (base_url and key and bucket):
+            return None
+        return cls(base_url, key, bucket)
+
+    def _safe_path(self, rel_path: str) -> str:
+        return "/".join(
+            urllib.parse.quote(p) for p in rel_path.replace("\\", "/").split("/")
+        )
+
+    def object_url(self, rel_path: str) -> str:
+        return f"{self.base_url}/storage/v1/object/{self.bucket}/{self._safe_path(rel_path)}"
+
+    def public_url(self, rel_path: str) -> str:
+        return f"{self.base_url}/storage/v1/object/public/{self.bucket}/{self._safe_path(rel_path)}"
+
+    def headers(self, content_type: str) -> dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.key}",
+            "apikey": self.key,
+            "Content-Type": content_type,
+            "x-upsert": "true",
+            "cache-control": IMMUTABLE_CACHE_CONTROL,
+        }
+
+
+class PermanentUploadError(Exception):
+    pass
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def swap_media_url(provisional_url: str, remote_url: str) -> None:
+    """
+    Point every item still using the local provisional URL at the remote copy
+    and bump the affected menus so caches and ETags move on.
+    """
+    from sqlalchemy import func, update
+
+    from app.core.db import SessionLocal
+    from app.core.menu_cache import bump_revisions
+    from app.models.menu import MEDIA_URL_COLUMNS, MenuItem
+
+    with SessionLocal() as db:
+        restaurant_ids: set[int] = set()
+        for column in MEDIA_URL_COLUMNS:
+            res = db.execute(
+                update(MenuItem)
+                .where(column == provisional_url)
+                .values({column.key: remote_url})
+                .returning(MenuItem.restaurant_id)
+            )
+            restaurant_ids.update(rid for (rid,) in res)
+        res = db.execute(
+            update(MenuItem)
+            .where(MenuItem.image_variants.contains(provisional_url, autoescape=True))
+            .values(image_variants=func.replace(MenuItem.image_variants, provisional_url, remote_url))
+            .returning(MenuItem.restaurant_id)
+        )
+        restaurant_ids.update(rid for (rid,) in res)
+        bump_revisions(db, restaurant_ids)
+        db.commit()
+
+
+class UploadQueue:
+    """
+    Durable background uploader.
+
+    Jobs are JSON files under ``queue_dir`` (so they survive restarts) and are
+    processed by a fixed pool of worker threads sharing one pooled HTTP client.
+    Failed attempts are retried with exponential backoff; once an object is
+    stored remotely, ``on_uploaded(provisional_url, remote_url)`` is called.
+    """
+
+    def __init__(
+        self,
+        target: Optional[StorageTarget],
+        queue_dir: str = QUEUE_DIR,
+        media_dir: str = MEDIA_DIR,
+        workers: int = UPLOAD_WORKERS,
+        max_attempts: int = UPLOAD_MAX_ATTEMPTS,
+        base_delay: float = UPLOAD_RETRY_BASE_DELAY,
+        timeout: float = UPLOAD_TIMEOUT,
+        on_uploaded: Callable[[str, str], None] = swap_media_url,
+    ):
+        self.target = target
+        self.queue_dir = queue_dir
+        self.media_dir = media_dir
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.timeout = timeout
+        self.on_uploaded = on_uploaded
+
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._client: Optional[httpx.Client] = None
+        # rel path -> public URL for objects known to exist remotely
+        self._known = LRUCache(max_entries=4096)
+        self.uploaded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.retries = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.target is not None
+
+    # ---------- producer side ----------
+    def known_remote_url(self, rel_path: str) -> Optional[str]:
+        return self._known.get(rel_path)
+
+    def enqueue_after_commit(self, db: Session, rel_path: str, content_type: str, provisional_url: str) -> None:
+        """
+        Queue the upload once ``db`` commits, so the row holding the
+        provisional URL is visible by the time the worker swaps it.
+        """
+        if self.enabled:
+            run_after_commit(db, self.enqueue, rel_path, content_type, provisional_url)
+
+    def enqueue(self, rel_path: str, content_type: str, provisional_url: str) -> bool:
+        if not self.enabled:
+            return False
+        job_id = rel_path.replace("\\", "/").replace("/", "__")
+        job = {
+            "rel_path": rel_path,
+            "content_type": content_type,
+            "provisional_url": provisional_url,
+            "attempts": 0,
+        }
+        with self._lock:
+            if job_id in self._pending:
+                return True
+            self._pending.add(job_id)
+        self._write_job(job_id, job)
+        self._queue.put(job_id)
+        return True
+
+    # ---------- lifecycle ----------
+    def start(self) -> None:
+        if not self.enabled or self._threads:
+            return
+        os.makedirs(self.queue_dir, exist_ok=True)
+        self._client = httpx.Client(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.workers, max_keepalive_connections=self.workers),
+        )
+        self._recover_stale_claims()
+        # every process replays the directory; the claim in _process makes
+        # sure each job is still handled by only one of them
+        for name in sorted(os.listdir(self.queue_dir)):
+            if name.endswith(".json"):
+                job_id = name[:-5]
+                with self._lock:
+                    if job_id in self._pending:
+                        continue
+                    self._pending.add(job_id)
+                self._queue.put(job_id)
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"upload-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def join(self) -> None:
+        """Block until no job is queued, running or waiting for a retry."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+            time.sleep(0.05)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "enabled": self.enabled,
+            "pending": pending,
+            "uploaded": self.uploaded,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "retries": self.retries,
+        }
+
+    # ---------- worker side ----------
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.queue_dir, f"{job_id}.json")
+
+    def _claim_path(self, job_id: str, pid: Optional[int] = None) -> str:
+        return os.path.join(self.queue_dir, f"{job_id}.{pid or os.getpid()}.claimed")
+
+    def _write_job(self, job_id: str, job: dict) -> None:
+        os.makedirs(self.queue_dir, exist_ok=True)
+        path = self._job_path(job_id)
+        with open(f"{path}.{os.getpid()}.tmp", "w") as f:
+            json.dump(job, f)
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+
+    def _claim(self, job_id: str) -> bool:
+        """
+        Atomically move ``<job>.json`` to ``<job>.<pid>.claimed``. Exactly one
+        process wins the rename; the others see the job gone and drop it.
+        """
+        try:
+            os.rename(self._job_path(job_id), self._claim_path(job_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _release(self, job_id: str, job: dict) -> None:
+        """Hand a claimed job back to the queue directory (e.g. while it waits for a retry)."""
+        self._write_job(job_id, job)
+        try:
+            os.remove(self._claim_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def _recover_stale_claims(self) -> None:
+        """Return jobs claimed by processes that no longer exist to the replay set."""
+        for name in os.listdir(self.queue_dir):
+            if not name.endswith(".claimed"):
+                continue
+            job_id, _, pid = name[: -len(".claimed")].rpartition(".")
+            if not pid.isdigit() or (int(pid) != os.getpid() and _process_alive(int(pid))):
+                continue
+            try:
+                os.rename(os.path.join(self.queue_dir, name), self._job_path(job_id))
+            except FileNotFoundError:
+                pass  # another process recovered it first
+
+    def _finish(self, job_id: str, ok: bool) -> None:
+        path = self._claim_path(job_id)
+        if ok:
+            if os.path.exists(path):
+                os.remove(path)
+        elif os.path.exists(path):
+            # keep for inspection, but out of the replay set
+            os.replace(path, f"{self._job_path(job_id)}.failed")
+        with self._lock:
+            self._pending.discard(job_id)
+
+    def _retry_later(self, job_id: str, job: dict, attempt: int) -> None:
+        self.retries += 1
+        self._release(job_id, job)
+        delay = self.base_delay * (2 ** (min(attempt, self.max_attempts) - 1))
+        delay *= 0.5 + random.random()
+        timer = threading.Timer(delay, self._queue.put, args=(job_id,))
+        timer.daemon = True
+        timer.start()
+
+    def _run(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            try:
+                self._process(job_id)
+            except Exception:
+                log.exception("upload job %s crashed", job_id)
+                self._finish(job_id, ok=False)
+
+    def _process(self, job_id: str) -> None:
+        if not self._claim(job_id):
+            # handled (or being handled) by another process
+            with self._lock:
+                self._pending.discard(job_id)
+            return
+        try:
+            with open(self._claim_path(job_id)) as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            self._finish(job_id, ok=False)
+            return
+
+        remote_url = job.get("remote_url")
+        if remote_url is None:
+            try:
+                remote_url = self._upload(job["rel_path"], job["content_type"])
+            except PermanentUploadError as e:
+                log.warning("upload of %s failed permanently: %s", job["rel_path"], e)
+                self.failed += 1
+                self._finish(job_id, ok=False)
+                return
+            except Exception as e:
+                job["attempts"] += 1
+                if job["attempts"] >= self.max_attempts:
+                    log.warning("upload of %s gave up after %d attempts: %s", job["rel_path"], job["attempts"], e)
+                    self.failed += 1
+                    self._finish(job_id, ok=False)
+                    return
+                self._retry_later(job_id, job, job["attempts"])
+                return
+            job["remote_url"] = remote_url
+            self._known.put(job["rel_path"], remote_url)
+
+        try:
+            self.on_uploaded(job["provisional_url"], remote_url)
+        except Exception as e:
+            # the object is stored remotely; only the row swap is retried
+            # (with no attempt cap, so rows never keep the local URL for good)
+            job["swap_attempts"] = job.get("swap_attempts", 0) + 1
+            log.warning("URL swap for %s failed (attempt %d): %s", job["rel_path"], job["swap_attempts"], e)
+            self._retry_later(job_id, job, job["swap_attempts"])
+            return
+        self._finish(job_id, ok=True)
+
+    def _upload(self, rel_path: str, content_type: str) -> str:
+        assert self._client is not None and self.target is not None
+        public_url = self.target.public_url(rel_path)
+
+        head = self._client.head(public_url)
+        if head.status_code == 200:
+            self.skipped += 1
+            return public_url
+
+        full = os.path.join(self.media_dir, rel_path)
+        if not os.path.exists(full):
+            raise PermanentUploadError(f"local file missing: {full}")
+        headers = self.target.headers(content_type)
+        headers["Content-Length"] = str(os.path.getsize(full))
+        with open(full, "rb") as f:
+            resp = self._client.post(self.target.object_url(rel_path), content=f, headers=headers)
+        if resp.status_code in (408, 429) or resp.status_code >= 500:
+            raise RuntimeError(f"HTTP {resp.status_code}")
+        if resp.status_code >= 400:
+            raise PermanentUploadError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+        self.uploaded += 1
+        return public_url
+
+
+upload_queue = UploadQueue(StorageTarget.from_env())
+
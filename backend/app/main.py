@@ -4,11 +4,16 @@ load_dotenv()
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from app.core.config import MEDIA_DIR
+from app.core.media_files import MediaFiles
+from app.core.upload_queue import upload_queue
+from app.core.llm import llm
+from app.core.db import dispose_async_engine
 from app.api.menu import router as menu_router
+from app.api.menu_bulk import router as menu_bulk_router
 from app.api.auth import router as auth_router
+from app.api.admin import router as admin_router
 from app.api.recommend import router as recommend_router    
 
 
@@ -23,10 +28,34 @@ app.add_middleware(
 )
 
 os.makedirs(MEDIA_DIR, exist_ok=True)
-app.mount("/media", StaticFiles(directory=MEDIA_DIR), name="media")
+app.mount("/media", MediaFiles(directory=MEDIA_DIR), name="media")
+
+
+@app.on_event("startup")
+def start_upload_queue():
+    # replays any uploads left in the durable queue by a previous process
+    upload_queue.start()
+
+
+@app.on_event("shutdown")
+def stop_upload_queue():
+    upload_queue.stop()
+
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm.aclose()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engine()
+
 
 app.include_router(menu_router)
+app.include_router(menu_bulk_router)
 app.include_router(auth_router)
+app.include_router(admin_router)
 app.include_router(recommend_router)
 
 
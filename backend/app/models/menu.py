@@ -1,9 +1,10 @@
 from sqlalchemy import (
     String, Text, Numeric, Boolean, ForeignKey,
-    DateTime, func, UniqueConstraint
+    DateTime, func, UniqueConstraint, Index, event
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.base import Base
+from app.core.dietary import compute_tags
 
 
 class Restaurant(Base):
@@ -14,6 +15,8 @@ class Restaurant(Base):
     theme_name: Mapped[str | None] = mapped_column(String(50), nullable=True)
     theme_primary: Mapped[str | None] = mapped_column(String(20), nullable=True)
     theme_secondary: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    # Bumped on every menu/theme write; drives ETags and cache keys.
+    menu_revision: Mapped[int] = mapped_column(default=0, server_default="0")
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     categories = relationship("Category", back_populates="restaurant", cascade="all, delete-orphan")
@@ -49,6 +52,9 @@ class Subcategory(Base):
 
 class MenuItem(Base):
     __tablename__ = "menu_items"
+    __table_args__ = (
+        Index("ix_menu_items_restaurant_available_tags", "restaurant_id", "is_available", "diet_tags"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     restaurant_id: Mapped[int] = mapped_column(ForeignKey("restaurants.id", ondelete="CASCADE"), index=True)
@@ -62,10 +68,27 @@ class MenuItem(Base):
 
     image_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
     model_url: Mapped[str | None] = mapped_column(String(500), nullable=True)  # GLB URL
+    model_optimized_url: Mapped[str | None] = mapped_column(String(500), nullable=True)  # pruned/repacked GLB
+    # JSON text: {"placeholder": "data:...", "sources": [{"url", "width", "type"}]}
+    image_variants: Mapped[str | None] = mapped_column(Text, nullable=True)
     is_available: Mapped[bool] = mapped_column(Boolean, default=True)
+    # app.core.dietary bit flags derived from name/description on every write
+    # (mapper events below; Core/bulk statements must set them explicitly)
+    diet_tags: Mapped[int] = mapped_column(default=0, server_default="0")
 
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     restaurant = relationship("Restaurant", back_populates="items")
     category = relationship("Category", back_populates="items")
     subcategory = relationship("Subcategory", back_populates="items")
+
+
+# Columns holding media URLs (rewritten when a provisional local URL goes remote).
+MEDIA_URL_COLUMNS = (MenuItem.image_url, MenuItem.model_url, MenuItem.model_optimized_url)
+
+
+@event.listens_for(MenuItem, "before_insert")
+@event.listens_for(MenuItem, "before_update")
+def _tag_item(mapper, connection, item: MenuItem) -> None:
+    # 0 means "no allergens" to the recommend filters, so no ORM writer may skip this
+    item.diet_tags = compute_tags(item.name, item.description)
@@ -1,6 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 
+class ImageVariantOut(BaseModel):
+    url: str
+    width: int
+    type: str = "image/webp"
+
 class MenuItemOut(BaseModel):
     id: int
     name: str
@@ -10,7 +15,10 @@ class MenuItemOut(BaseModel):
     category: Optional[str] = None
     subcategory: Optional[str] = None
     imageUrl: Optional[str] = None
+    imageVariants: List[ImageVariantOut] = []
+    imagePlaceholder: Optional[str] = None
     modelUrl: Optional[str] = None
+    modelOptimizedUrl: Optional[str] = None
     isAvailable: bool = True
 
     class Config:
@@ -19,3 +27,32 @@ class MenuItemOut(BaseModel):
 class MenuResponse(BaseModel):
     restaurantSlug: str
     items: List[MenuItemOut]
+    nextCursor: Optional[str] = None
+
+class MenuSearchResponse(BaseModel):
+    restaurantSlug: str
+    query: str
+    items: List[MenuItemOut]
+    nextOffset: Optional[int] = None
+
+class AvailabilityUpdate(BaseModel):
+    itemIds: List[int] = []
+    categoryIds: List[int] = []
+    available: bool
+
+class ItemPatch(BaseModel):
+    # omitted fields are left as they are; category "" clears the category
+    id: int
+    name: Optional[str] = Field(None, min_length=1, max_length=120)
+    description: Optional[str] = None
+    price: Optional[float] = Field(None, ge=0, lt=1e8, allow_inf_nan=False)  # Numeric(10, 2)
+    currency: Optional[str] = Field(None, min_length=3, max_length=3)
+    category: Optional[str] = Field(None, max_length=80)
+    subcategory: Optional[str] = Field(None, max_length=80)
+    isAvailable: Optional[bool] = None
+
+class ItemsPatch(BaseModel):
+    items: List[ItemPatch] = Field(..., min_length=1, max_length=1000)
+
+class ItemsPatchOut(BaseModel):
+    items: List[MenuItemOut]
@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+
+# The app builds its engines from DATABASE_URL at import time: point it at a
+# throwaway SQLite file before anything under app/ is imported.
+_DB_FILE = os.path.join(tempfile.mkdtemp(prefix="menuart-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+os.environ.setdefault("MEDIA_DIR", os.path.join(os.path.dirname(_DB_FILE), "media"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    from app.core.base import Base
+    from app.core.db import engine
+    from app.models import admin, menu  # noqa: F401 (register tables)
+
+    Base.metadata.create_all(engine)
+    return engine
+
+
+class StubServer:
+    """
+    Threaded local HTTP stand-in for external services. ``handler(request)``
+    gets a dict (method, path, headers, body) and returns (status, headers,
+    body); every request is also appended to ``requests``.
+    """
+
+    def __init__(self, handler):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        stub = self
+        self.handler = handler
+        self.requests: list[dict] = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = {
+                    "method": self.command,
+                    "path": self.path,
+                    "headers": dict(self.headers),
+                    "body": self.rfile.read(length) if length else b"",
+                }
+                stub.requests.append(request)
+                status, headers, body = stub.handler(request)
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    try:
+                        self.wfile.write(body)
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass
+
+            do_GET = do_HEAD = do_POST = do_PUT = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        import threading
+
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def http_stub():
+    """Start a StubServer for ``handler``; stopped at teardown."""
+    servers = []
+
+    def start(handler) -> StubServer:
+        server = StubServer(handler).__enter__()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
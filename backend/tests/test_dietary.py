@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+
+from app.core.db import SessionLocal
+from app.core.dietary import GLUTEN, LACTOSE
+from app.main import app
+from app.models.menu import MenuItem, Restaurant
+
+
+def test_orm_writers_get_diet_tags(db_engine):
+    with SessionLocal() as db:
+        r = Restaurant(name="Tags", slug="tags")
+        db.add(r)
+        db.flush()
+        # written the way seed.py does it: no diet_tags given
+        pasta = MenuItem(restaurant_id=r.id, name="AR Pasta", description="Creamy pasta dish", price=12.99)
+        salad = MenuItem(restaurant_id=r.id, name="Green salad", description="Leaves", price=8)
+        db.add_all([pasta, salad])
+        db.commit()
+        assert pasta.diet_tags == LACTOSE | GLUTEN
+        assert salad.diet_tags == 0
+
+        salad.description = "Leaves with parmesan"
+        db.commit()
+        assert salad.diet_tags == LACTOSE
+
+
+def test_local_recommend_excludes_untagged_seed_allergens(db_engine):
+    with SessionLocal() as db:
+        r = Restaurant(name="Allergy", slug="allergy")
+        db.add(r)
+        db.flush()
+        db.add(MenuItem(restaurant_id=r.id, name="AR Pasta", description="Creamy pasta dish", price=12.99))
+        db.add(MenuItem(restaurant_id=r.id, name="Grilled salmon", description="With lemon", price=20))
+        db.commit()
+        salmon_id = db.query(MenuItem.id).filter(MenuItem.name == "Grilled salmon").scalar()
+
+    resp = TestClient(app).post(
+        "/api/restaurants/allergy/recommend?mode=local",
+        json={"allergies": ["lactose", "gluten"]},
+    )
+    assert resp.status_code == 200
+    assert [p["id"] for p in resp.json()["picks"]] == [salmon_id]
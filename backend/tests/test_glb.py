@@ -0,0 +1,55 @@
+import io
+import struct
+
+from app.core.glb import optimize_glb, parse_glb, write_glb
+
+
+def glb(doc: dict, *parts: bytes) -> bytes:
+    out = io.BytesIO()
+    write_glb(out, doc, parts)
+    return out.getvalue()
+
+
+def instanced_doc(extensions_used: list[str]) -> tuple[dict, bytes]:
+    positions = struct.pack("<9f", 0, 0, 0, 1, 0, 0, 0, 1, 0)
+    unused = struct.pack("<3f", 9, 9, 9)
+    offsets = struct.pack("<6f", 0, 0, 0, 2, 0, 0)
+    doc = {
+        "asset": {"version": "2.0"},
+        "extensionsUsed": extensions_used,
+        "buffers": [{"byteLength": len(positions) + len(unused) + len(offsets)}],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": len(positions)},
+            {"buffer": 0, "byteOffset": len(positions), "byteLength": len(unused)},
+            {"buffer": 0, "byteOffset": len(positions) + len(unused), "byteLength": len(offsets)},
+        ],
+        "accessors": [
+            {"bufferView": 0, "componentType": 5126, "count": 3, "type": "VEC3"},
+            {"bufferView": 1, "componentType": 5126, "count": 1, "type": "VEC3"},
+            {"bufferView": 2, "componentType": 5126, "count": 2, "type": "VEC3"},
+        ],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}}]}],
+        "nodes": [{"mesh": 0, "extensions": {"EXT_mesh_gpu_instancing": {"attributes": {"TRANSLATION": 2}}}}],
+        "scenes": [{"nodes": [0]}],
+    }
+    return doc, positions + unused + offsets
+
+
+def test_instancing_accessors_are_kept_and_remapped():
+    doc, bin_chunk = instanced_doc(["EXT_mesh_gpu_instancing"])
+    out = io.BytesIO()
+    assert optimize_glb(glb(doc, bin_chunk), out) is not None
+
+    new_doc, new_bin = parse_glb(out.getvalue())
+    assert len(new_doc["accessors"]) == 2
+    translation = new_doc["nodes"][0]["extensions"]["EXT_mesh_gpu_instancing"]["attributes"]["TRANSLATION"]
+    view = new_doc["bufferViews"][new_doc["accessors"][translation]["bufferView"]]
+    data = new_bin[view["byteOffset"]: view["byteOffset"] + view["byteLength"]]
+    assert struct.unpack("<6f", data) == (0, 0, 0, 2, 0, 0)
+
+
+def test_unknown_extensions_are_left_alone():
+    doc, bin_chunk = instanced_doc(["EXT_mesh_gpu_instancing", "KHR_animation_pointer"])
+    out = io.BytesIO()
+    assert optimize_glb(glb(doc, bin_chunk), out) is None
+    assert out.getvalue() == b""
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.core.llm import CircuitBreaker, LLMClient, LLMUnavailable
+
+
+def response_body(text: str) -> bytes:
+    return json.dumps({
+        "id": "resp_1",
+        "object": "response",
+        "created_at": 0,
+        "model": "stub",
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": "msg_1",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+    }).encode()
+
+
+class FakeLLM:
+    """Responses API stand-in: answers ``text`` after ``delay`` with ``status``."""
+
+    def __init__(self, text="ok", delay=0.0, status=200):
+        self.text = text
+        self.delay = delay
+        self.status = status
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if self.status != 200:
+                return self.status, {"Content-Type": "application/json"}, b'{"error":{"message":"boom"}}'
+            return 200, {"Content-Type": "application/json"}, response_body(self.text)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def fake_llm(http_stub, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    fake = FakeLLM()
+    server = http_stub(fake)
+
+    def client(**kw) -> LLMClient:
+        kw.setdefault("timeout", 2.0)
+        kw.setdefault("breaker", CircuitBreaker(2, 0.2))
+        return LLMClient(model="stub", base_url=f"{server.url}/v1", **kw)
+
+    return fake, server, client
+
+
+def test_complete_returns_output_text(fake_llm):
+    fake, _, client = fake_llm
+    fake.text = ' {"picks":[]} '
+    assert asyncio.run(client().complete("hi")) == '{"picks":[]}'
+
+
+def test_slow_provider_times_out(fake_llm):
+    fake, _, client = fake_llm
+    fake.delay = 1.0
+    llm = client(timeout=0.2)
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(llm.complete("hi"))
+    assert llm.breaker.stats()["consecutiveFailures"] == 1
+
+
+def test_breaker_opens_then_half_open_trial_closes_it(fake_llm):
+    fake, server, client = fake_llm
+    llm = client()
+
+    async def scenario():
+        fake.status = 500
+        for _ in range(2):
+            with pytest.raises(LLMUnavailable):
+                await llm.complete("hi")
+        assert llm.breaker.state == "open"
+
+        sent = len(server.requests)
+        with pytest.raises(LLMUnavailable, match="circuit open"):
+            await llm.complete("hi")
+        assert len(server.requests) == sent  # rejected without calling the provider
+
+        await asyncio.sleep(0.25)
+        assert llm.breaker.state == "half_open"
+        fake.status = 200
+        assert await llm.complete("hi") == "ok"
+        assert llm.breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_failed_half_open_trial_reopens(fake_llm):
+    fake, _, client = fake_llm
+    llm = client()
+
+    async def scenario():
+        fake.status = 500
+        for _ in range(2):
+            with pytest.raises(LLMUnavailable):
+                await llm.complete("hi")
+        await asyncio.sleep(0.25)
+        with pytest.raises(LLMUnavailable):
+            await llm.complete("hi")
+        assert llm.breaker.state == "open"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_half_open_trial_is_released(fake_llm):
+    fake, _, client = fake_llm
+    llm = client()
+
+    async def scenario():
+        fake.status = 500
+        for _ in range(2):
+            with pytest.raises(LLMUnavailable):
+                await llm.complete("hi")
+        await asyncio.sleep(0.25)
+
+        fake.status, fake.delay = 200, 0.5
+        trial = asyncio.create_task(llm.complete("hi"))
+        await asyncio.sleep(0.1)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        fake.delay = 0.0
+        assert await llm.complete("hi") == "ok"
+        assert llm.breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_is_capped_by_the_semaphore(fake_llm):
+    fake, _, client = fake_llm
+    fake.delay = 0.1
+    llm = client(max_concurrency=2)
+
+    async def scenario():
+        return await asyncio.gather(*(llm.complete("hi") for _ in range(6)))
+
+    assert asyncio.run(scenario()) == ["ok"] * 6
+    assert fake.max_in_flight == 2
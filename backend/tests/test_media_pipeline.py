@@ -0,0 +1,61 @@
+import os
+import shutil
+
+import pytest
+
+from app.core import media_pipeline
+from app.core.storage import StoredMedia
+
+PASTA_GLB = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "public", "models", "Pasta.glb")
+
+
+def test_optimized_model_not_smaller_is_not_stored(tmp_path, monkeypatch):
+    # Pasta.glb is already tight: optimize_glb returns the same byte count
+    rel = "cas/ab/pasta.glb"
+    os.makedirs(tmp_path / "cas" / "ab")
+    shutil.copy(PASTA_GLB, tmp_path / rel)
+    monkeypatch.setattr(media_pipeline, "MEDIA_DIR", str(tmp_path))
+    updates = []
+    monkeypatch.setattr(media_pipeline, "_set_item_media", lambda *args: updates.append(args))
+
+    size = os.path.getsize(tmp_path / rel)
+    media_pipeline.optimize_model(1, StoredMedia(f"http://local/media/{rel}", rel, "ab", size))
+
+    assert not os.path.exists(tmp_path / "cas" / "ab" / "pasta.opt.glb")
+    assert updates == []
+
+
+def test_models_over_the_size_cap_are_not_optimized(tmp_path, monkeypatch):
+    rel = "cas/ab/big.glb"
+    os.makedirs(tmp_path / "cas" / "ab")
+    shutil.copy(PASTA_GLB, tmp_path / rel)
+    monkeypatch.setattr(media_pipeline, "MEDIA_DIR", str(tmp_path))
+    monkeypatch.setattr(media_pipeline, "GLB_OPTIMIZE_MAX_BYTES", 1024)
+    monkeypatch.setattr(media_pipeline, "GLB_QUANTIZE", True)
+    monkeypatch.setattr(media_pipeline, "optimize_glb", lambda *a, **kw: pytest.fail("optimized"))
+    updates = []
+    monkeypatch.setattr(media_pipeline, "_set_item_media", lambda *args: updates.append(args))
+
+    size = os.path.getsize(tmp_path / rel)
+    media_pipeline.optimize_model(1, StoredMedia(f"http://local/media/{rel}", rel, "ab", size))
+
+    assert not os.path.exists(tmp_path / "cas" / "ab" / "big.opt.glb")
+    assert updates == []
+
+
+def test_smaller_optimized_model_is_stored(tmp_path, monkeypatch):
+    rel = "cas/ab/pasta.glb"
+    os.makedirs(tmp_path / "cas" / "ab")
+    shutil.copy(PASTA_GLB, tmp_path / rel)
+    monkeypatch.setattr(media_pipeline, "MEDIA_DIR", str(tmp_path))
+    monkeypatch.setattr(media_pipeline, "GLB_QUANTIZE", True)
+    updates = []
+    monkeypatch.setattr(media_pipeline, "_set_item_media", lambda *args: updates.append(args))
+
+    size = os.path.getsize(tmp_path / rel)
+    media_pipeline.optimize_model(1, StoredMedia(f"http://local/media/{rel}", rel, "ab", size))
+
+    optimized = tmp_path / "cas" / "ab" / "pasta.opt.glb"
+    assert 0 < os.path.getsize(optimized) < size
+    assert not os.path.exists(f"{optimized}.part")
+    assert len(updates) == 1
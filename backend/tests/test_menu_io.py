@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.db import SessionLocal
+from app.core.deps import require_admin
+from app.core.menu_io import RowError, clean_row
+from app.main import app
+from app.models.menu import Restaurant
+
+
+@pytest.mark.parametrize("price", ["nan", "inf", "-inf", "1e12", "100000000"])
+def test_clean_row_rejects_unstorable_prices(price):
+    with pytest.raises(RowError, match="price"):
+        clean_row({"name": "Soup", "price": price})
+
+
+def test_clean_row_accepts_largest_storable_price():
+    assert clean_row({"name": "Soup", "price": "99999999.99"})["price"] == 99999999.99
+
+
+def test_import_reports_bad_prices_per_row(db_engine):
+    with SessionLocal() as db:
+        db.add(Restaurant(name="Import", slug="import"))
+        db.commit()
+    app.dependency_overrides[require_admin] = lambda: "admin@example.com"
+    try:
+        resp = TestClient(app).post(
+            "/api/restaurants/import/import",
+            files={"file": ("menu.csv", b"name,price\nSoup,4.5\nStew,nan\nPie,1e12\n", "text/csv")},
+        )
+    finally:
+        app.dependency_overrides.pop(require_admin)
+    assert resp.status_code == 422
+    assert [e["row"] for e in resp.json()["detail"]["errors"]] == [2, 3]
@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.db import SessionLocal, get_async_engine
+from app.main import app
+from app.models.menu import Category, MenuItem, Restaurant, Subcategory
+
+
+def seed_menu(slug: str, n_items: int) -> None:
+    with SessionLocal() as db:
+        r = Restaurant(name=slug.title(), slug=slug)
+        db.add(r)
+        db.flush()
+        categories = [Category(restaurant_id=r.id, name=f"Cat {i}", sort_order=i) for i in range(5)]
+        db.add_all(categories)
+        db.flush()
+        subcategories = [Subcategory(category_id=c.id, name=f"Sub {c.name}") for c in categories]
+        db.add_all(subcategories)
+        db.flush()
+        for i in range(n_items):
+            db.add(MenuItem(
+                restaurant_id=r.id,
+                category_id=categories[i % 5].id,
+                subcategory_id=subcategories[i % 5].id,
+                name=f"Dish {i}",
+                description="Tasty",
+                price=10 + i,
+            ))
+        db.commit()
+
+
+@contextmanager
+def count_statements():
+    engine = get_async_engine().sync_engine
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def menu_query_count(slug: str) -> tuple[int, int]:
+    # no lifespan: the upload queue and friends aren't needed for a read
+    client = TestClient(app)
+    with count_statements() as statements:
+        resp = client.get(f"/api/restaurants/{slug}/menu")
+    assert resp.status_code == 200
+    return len(statements), len(resp.json()["items"])
+
+
+def test_menu_listing_query_count_is_independent_of_menu_size(db_engine):
+    seed_menu("small", 1)
+    seed_menu("large", 50)
+
+    small_queries, small_items = menu_query_count("small")
+    large_queries, large_items = menu_query_count("large")
+
+    assert (small_items, large_items) == (1, 50)
+    assert small_queries == large_queries
+    assert large_queries <= 2  # restaurant lookup + one joined menu SELECT
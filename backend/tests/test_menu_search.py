@@ -0,0 +1,98 @@
+from fastapi.testclient import TestClient
+
+from app.core.db import SessionLocal
+from app.core.deps import require_admin
+from app.core.menu_queries import MenuRow
+from app.core.menu_search import MenuSearchIndex
+from app.main import app
+from app.models.menu import Category, MenuItem, Restaurant
+
+
+def row(item_id: int, name: str, description: str = "", category: str = None) -> MenuRow:
+    return MenuRow(
+        id=item_id, name=name, description=description, price=10.0, currency="USD",
+        image_url=None, model_url=None, model_optimized_url=None, image_variants=None,
+        is_available=True, diet_tags=0, category=category, subcategory=None, category_sort=0,
+    )
+
+
+INDEX = MenuSearchIndex([
+    row(1, "Classic Burger", "Beef patty, cheddar", "Mains"),
+    row(2, "Chicken Wrap", "Grilled chicken, lettuce", "Mains"),
+    row(3, "Caesar Salad", "Romaine, croutons, chicken strips", "Starters"),
+    row(4, "Fries", "Hand-cut potatoes", "Sides"),
+    row(5, "Chocolate Cake", "Rich chocolate sponge", "Desserts"),
+])
+
+
+def ids(results) -> list[int]:
+    return [r.id for r in results]
+
+
+def test_name_hits_outrank_description_hits():
+    # "chicken" is in #2's name but only #3's description
+    assert ids(INDEX.search("chicken", 10)) == [2, 3]
+
+
+def test_every_term_must_match():
+    assert ids(INDEX.search("chicken lettuce", 10)) == [2]
+
+
+def test_plurals_fold_to_the_singular():
+    assert ids(INDEX.search("burgers", 10)) == [1]
+
+
+def test_category_names_are_searchable():
+    assert ids(INDEX.search("desserts", 10)) == [5]
+
+
+def test_prefixes_match_through_trigrams():
+    assert ids(INDEX.search("burg", 10)) == [1]
+    assert ids(INDEX.search("choc", 10)) == [5]
+
+
+def test_typos_match_through_trigrams():
+    assert ids(INDEX.search("chiken wrap", 10)) == [2]
+    assert ids(INDEX.search("choclate", 10)) == [5]
+
+
+def test_no_match_and_paging():
+    assert INDEX.search("sushi", 10) == []
+    assert ids(INDEX.search("chicken", 1, offset=1)) == [3]
+
+
+def test_search_index_follows_item_writes(db_engine):
+    with SessionLocal() as db:
+        r = Restaurant(name="Search", slug="search")
+        db.add(r)
+        db.flush()
+        mains = Category(restaurant_id=r.id, name="Mains")
+        db.add(mains)
+        db.flush()
+        item = MenuItem(restaurant_id=r.id, category_id=mains.id, name="Beef Burger", price=9)
+        db.add(item)
+        db.commit()
+        item_id = item.id
+
+    client = TestClient(app)
+
+    def search(q: str) -> list[int]:
+        resp = client.get("/api/restaurants/search/search", params={"q": q})
+        assert resp.status_code == 200
+        return [it["id"] for it in resp.json()["items"]]
+
+    assert search("burger") == [item_id]
+    assert search("pizza") == []
+
+    app.dependency_overrides[require_admin] = lambda: "admin@example.com"
+    try:
+        resp = client.patch(
+            "/api/restaurants/search/items", json={"items": [{"id": item_id, "name": "Margherita Pizza"}]}
+        )
+    finally:
+        app.dependency_overrides.pop(require_admin)
+    assert resp.status_code == 200
+
+    # the write bumped the menu revision, so the cached index is rebuilt
+    assert search("pizza") == [item_id]
+    assert search("burger") == []
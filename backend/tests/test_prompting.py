@@ -0,0 +1,67 @@
+import asyncio
+
+from app.core.menu_queries import MenuRow
+from app.core.prompting import (
+    build_prompt,
+    estimate_tokens,
+    item_line,
+    menu_block_cache,
+    menu_block_for,
+    select_candidates,
+)
+
+
+def row(item_id: int, description: str = "") -> MenuRow:
+    return MenuRow(
+        id=item_id, name=f"Dish {item_id}", description=description, price=10.0, currency="USD",
+        image_url=None, model_url=None, model_optimized_url=None, image_variants=None,
+        is_available=True, diet_tags=0, category="Mains", subcategory=None, category_sort=0,
+    )
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_select_candidates_caps_at_k_and_keeps_rank_order():
+    ranked = [row(i) for i in range(10, 0, -1)]
+    assert [r.id for r in select_candidates(ranked, k=3, token_budget=10_000)] == [10, 9, 8]
+
+
+def test_select_candidates_stops_at_token_budget():
+    ranked = [row(i) for i in range(1, 21)]
+    cost = estimate_tokens(item_line(ranked[0])) + 1
+    picked = select_candidates(ranked, k=20, token_budget=cost * 5)
+    assert [r.id for r in picked] == [1, 2, 3, 4, 5]
+
+
+def test_select_candidates_keeps_the_best_even_if_over_budget():
+    ranked = [row(1, "x" * 500), row(2)]
+    assert [r.id for r in select_candidates(ranked, k=20, token_budget=1)] == [1]
+
+
+def test_prompt_lists_only_candidates_without_shared_block():
+    candidates = [row(3), row(1)]
+    prompt = build_prompt("", candidates, {"mood": "hungry"})
+    menu = prompt.split("\nMENU:\n", 1)[1].split("\n\nCANDIDATES:", 1)[0]
+    assert menu.splitlines() == [item_line(r) for r in candidates]
+    assert "CANDIDATES:\n[3,1]" in prompt
+
+
+def test_menu_block_disabled_does_not_load_the_menu():
+    async def load():
+        raise AssertionError("menu loaded")
+
+    assert run(menu_block_for(1, 1, load, enabled=False)) == ""
+
+
+def test_menu_block_bounded_by_token_budget():
+    menu_block_cache.clear()
+    menu = [row(2), row(1)]
+
+    async def load():
+        return menu
+
+    block = run(menu_block_for(1, 1, load, enabled=True, token_budget=10_000))
+    assert block.splitlines() == [item_line(menu[1]), item_line(menu[0])]
+    assert run(menu_block_for(1, 2, load, enabled=True, token_budget=estimate_tokens(block) - 1)) == ""
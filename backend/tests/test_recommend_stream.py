@@ -0,0 +1,72 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.api import recommend
+from app.core.db import SessionLocal
+from app.main import app
+from app.models.menu import MenuItem, Restaurant
+
+
+def seed(slug: str) -> int:
+    with SessionLocal() as db:
+        r = Restaurant(name=slug.title(), slug=slug)
+        db.add(r)
+        db.flush()
+        item = MenuItem(restaurant_id=r.id, name="Grilled salmon", description="With lemon", price=20)
+        db.add(item)
+        db.commit()
+        return item.id
+
+
+def fake_stream(*chunks):
+    async def stream(prompt):
+        for chunk in chunks:
+            yield chunk
+    return stream
+
+
+def events(resp) -> list[tuple[str, dict]]:
+    out = []
+    for block in resp.text.strip().split("\n\n"):
+        name, data = block.split("\n", 1)
+        out.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return out
+
+
+def test_garbled_stream_is_not_cached(db_engine, monkeypatch):
+    item_id = seed("garbled")
+    client = TestClient(app)
+
+    monkeypatch.setattr(recommend.llm, "stream", fake_stream('{"picks":[{"id":', "oops"))
+    resp = client.post("/api/restaurants/garbled/recommend/stream", json={})
+    assert [name for name, _ in events(resp)] == ["error"]
+
+    # nothing was cached: the next request asks the model again
+    monkeypatch.setattr(recommend.llm, "stream", fake_stream('{"picks":[{"id":%d,"reason":"ok"}]}' % item_id))
+    resp = client.post("/api/restaurants/garbled/recommend/stream", json={})
+    assert events(resp)[-1] == ("done", {"source": "llm"})
+
+
+def test_empty_stream_is_not_cached(db_engine, monkeypatch):
+    seed("empty")
+    client = TestClient(app)
+
+    monkeypatch.setattr(recommend.llm, "stream", fake_stream('{"picks":[]}'))
+    for _ in range(2):
+        resp = client.post("/api/restaurants/empty/recommend/stream", json={})
+        assert [name for name, _ in events(resp)] == ["error"]
+
+
+def test_complete_stream_is_cached(db_engine, monkeypatch):
+    item_id = seed("streamed")
+    monkeypatch.setattr(
+        recommend.llm, "stream", fake_stream('{"picks":[{"id":%d,' % item_id, '"reason":"fresh"}]}')
+    )
+    client = TestClient(app)
+
+    resp = client.post("/api/restaurants/streamed/recommend/stream", json={})
+    assert events(resp) == [("pick", {"id": item_id, "reason": "fresh"}), ("done", {"source": "llm"})]
+
+    resp = client.post("/api/restaurants/streamed/recommend/stream", json={})
+    assert events(resp)[-1] == ("done", {"source": "cache"})
@@ -0,0 +1,174 @@
+import os
+import time
+
+from app.core.config import IMMUTABLE_CACHE_CONTROL
+from app.core.upload_queue import StorageTarget, UploadQueue
+
+
+def make_queue(tmp_path, on_uploaded, uploads):
+    q = UploadQueue(
+        StorageTarget("http://storage.invalid", "key", "bucket"),
+        queue_dir=str(tmp_path / ".upload-queue"),
+        media_dir=str(tmp_path),
+        workers=1,
+        base_delay=0.01,
+        on_uploaded=on_uploaded,
+    )
+
+    def fake_upload(rel_path, content_type):
+        uploads.append(rel_path)
+        return f"http://storage.invalid/public/{rel_path}"
+
+    q._upload = fake_upload
+    return q
+
+
+def test_failed_swap_is_retried_without_reuploading(tmp_path):
+    uploads, swaps = [], []
+
+    def flaky_swap(provisional, remote):
+        swaps.append(remote)
+        if len(swaps) == 1:
+            raise RuntimeError("db blip")
+
+    q = make_queue(tmp_path, flaky_swap, uploads)
+    q.start()
+    try:
+        q.enqueue("cas/ab/abc.png", "image/png", "http://local/media/cas/ab/abc.png")
+        q.join()
+    finally:
+        q.stop()
+
+    assert uploads == ["cas/ab/abc.png"]
+    assert len(swaps) == 2
+    assert os.listdir(q.queue_dir) == []
+
+
+def test_job_claimed_by_another_process_is_skipped(tmp_path):
+    uploads = []
+    first = make_queue(tmp_path, lambda *a: None, uploads)
+    second = make_queue(tmp_path, lambda *a: None, uploads)
+    first._write_job("cas__ab__abc.png", {
+        "rel_path": "cas/ab/abc.png",
+        "content_type": "image/png",
+        "provisional_url": "http://local/media/cas/ab/abc.png",
+        "attempts": 0,
+    })
+
+    assert first._claim("cas__ab__abc.png")
+    # the other process lost the race: its replay drops the job
+    second._pending.add("cas__ab__abc.png")
+    second._process("cas__ab__abc.png")
+    assert uploads == []
+    assert not second._pending
+
+
+# ---------- real HTTP path against a local storage stand-in ----------
+REL = "cas/ab/abc.png"
+PROVISIONAL = f"http://local/media/{REL}"
+
+
+def stub_storage(http_stub, head_status=404, post=((200, 0.0),)):
+    """Storage API stand-in: HEAD answers ``head_status``; POSTs walk ``post`` (status, delay)."""
+    post = list(post)
+
+    def handler(request):
+        if request["method"] == "HEAD":
+            return head_status, {}, b""
+        status, delay = post.pop(0) if len(post) > 1 else post[0]
+        time.sleep(delay)
+        return status, {"Content-Type": "application/json"}, b'{"Key":"bucket/cas/ab/abc.png"}'
+
+    return http_stub(handler)
+
+
+def run_queue(tmp_path, server, timeout=5.0):
+    os.makedirs(tmp_path / "cas" / "ab", exist_ok=True)
+    (tmp_path / REL).write_bytes(b"png bytes")
+    swaps = []
+    q = UploadQueue(
+        StorageTarget(server.url, "key", "bucket"),
+        queue_dir=str(tmp_path / ".upload-queue"),
+        media_dir=str(tmp_path),
+        workers=1,
+        max_attempts=3,
+        base_delay=0.01,
+        timeout=timeout,
+        on_uploaded=lambda provisional, remote: swaps.append((provisional, remote)),
+    )
+    q.start()
+    try:
+        q.enqueue(REL, "image/png", PROVISIONAL)
+        q.join()
+    finally:
+        q.stop()
+    return q, swaps
+
+
+def posts(server) -> list[dict]:
+    return [r for r in server.requests if r["method"] == "POST"]
+
+
+def test_upload_posts_the_file_with_storage_headers(tmp_path, http_stub):
+    server = stub_storage(http_stub)
+    q, swaps = run_queue(tmp_path, server)
+
+    (post,) = posts(server)
+    assert post["path"] == "/storage/v1/object/bucket/cas/ab/abc.png"
+    assert post["body"] == b"png bytes"
+    headers = {k.lower(): v for k, v in post["headers"].items()}
+    assert headers["authorization"] == "Bearer key"
+    assert headers["x-upsert"] == "true"
+    assert headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert swaps == [(PROVISIONAL, f"{server.url}/storage/v1/object/public/bucket/cas/ab/abc.png")]
+    assert q.stats()["uploaded"] == 1
+    assert os.listdir(q.queue_dir) == []
+
+
+def test_existing_remote_object_is_not_uploaded_again(tmp_path, http_stub):
+    server = stub_storage(http_stub, head_status=200)
+    q, swaps = run_queue(tmp_path, server)
+
+    assert [r["method"] for r in server.requests] == ["HEAD"]
+    assert q.stats()["skipped"] == 1
+    assert len(swaps) == 1
+
+
+def test_server_errors_are_retried_with_backoff(tmp_path, http_stub):
+    server = stub_storage(http_stub, post=[(503, 0.0), (500, 0.0), (200, 0.0)])
+    q, swaps = run_queue(tmp_path, server)
+
+    assert [r["method"] for r in server.requests] == ["HEAD", "POST"] * 3
+    assert q.stats()["retries"] == 2
+    assert q.stats()["uploaded"] == 1
+    assert len(swaps) == 1
+
+
+def test_server_errors_give_up_after_max_attempts(tmp_path, http_stub):
+    server = stub_storage(http_stub, post=[(502, 0.0)])
+    q, swaps = run_queue(tmp_path, server)
+
+    assert len(posts(server)) == 3
+    assert q.stats()["failed"] == 1
+    assert swaps == []
+    assert os.listdir(q.queue_dir) == ["cas__ab__abc.png.json.failed"]
+
+
+def test_client_errors_fail_permanently(tmp_path, http_stub):
+    server = stub_storage(http_stub, post=[(400, 0.0)])
+    q, swaps = run_queue(tmp_path, server)
+
+    assert len(posts(server)) == 1
+    assert q.stats()["failed"] == 1
+    assert q.stats()["retries"] == 0
+    assert swaps == []
+    assert os.listdir(q.queue_dir) == ["cas__ab__abc.png.json.failed"]
+
+
+def test_timeouts_are_retried(tmp_path, http_stub):
+    server = stub_storage(http_stub, post=[(200, 1.0), (200, 0.0)])
+    q, swaps = run_queue(tmp_path, server, timeout=0.3)
+
+    assert len(posts(server)) == 2
+    assert q.stats()["retries"] == 1
+    assert len(swaps) == 1
@@ -105,3 +105,18 @@ export async function deleteMenuItem(slug, itemId) {
 
   return res.json();
 }
+
+export async function setItemsAvailability(slug, { itemIds = [], categoryIds = [], available }) {
+  const res = await fetch(`${API_BASE}/restaurants/${slug}/items/availability`, {
+    method: "POST",
+    headers: authHeaders({ "Content-Type": "application/json" }),
+    body: JSON.stringify({ itemIds, categoryIds, available }),
+  });
+
+  if (!res.ok) {
+    const text = await res.text();
+    throw new Error(text || "Failed to update availability");
+  }
+
+  return res.json();
+}
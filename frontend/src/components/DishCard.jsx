@@ -6,18 +6,24 @@ export default function DishCard({ item, compact = false, layout = "grid" }) {
   const params = useParams();
   const [isHovered, setIsHovered] = useState(false);
 
-  const hasModel = !!item.modelUrl;
+  const modelUrl = item.modelOptimizedUrl || item.modelUrl;
+  const hasModel = !!modelUrl;
   const restaurantSlug = params.slug; // Get slug from route params
 
   const viewAR = () => {
     if (!hasModel) return;
-    const arUrl = `/ar?model=${encodeURIComponent(item.modelUrl)}&name=${encodeURIComponent(
+    const arUrl = `/ar?model=${encodeURIComponent(modelUrl)}&name=${encodeURIComponent(
       item.name
     )}${restaurantSlug ? `&slug=${encodeURIComponent(restaurantSlug)}` : ""}`;
     nav(arUrl);
   };
 
   const isList = layout === "list";
+  const variants = item.imageVariants || [];
+  const srcSet = variants.length
+    ? variants.map((v) => `${v.url} ${v.width}w`).join(", ")
+    : undefined;
+  const sizes = isList ? (compact ? "120px" : "140px") : "(max-width: 640px) 100vw, 360px";
   const cardStyle = compact
     ? { ...styles.card, ...styles.cardCompact }
     : styles.card;
@@ -57,10 +63,22 @@ export default function DishCard({ item, compact = false, layout = "grid" }) {
       onMouseEnter={() => setIsHovered(true)}
       onMouseLeave={() => setIsHovered(false)}
     >
-      <div style={{ ...imgWrapStyle, ...imgLayoutStyle }}>
+      <div
+        style={{
+          ...imgWrapStyle,
+          ...imgLayoutStyle,
+          ...(item.imagePlaceholder
+            ? { backgroundImage: `url(${item.imagePlaceholder})`, backgroundSize: "cover" }
+            : {}),
+        }}
+      >
         {item.imageUrl ? (
           <img
             src={item.imageUrl}
+            srcSet={srcSet}
+            sizes={srcSet ? sizes : undefined}
+            loading="lazy"
+            decoding="async"
             alt={item.name}
             style={{
               ...styles.img,
@@ -8,6 +8,7 @@ import {
   deleteMenuItem,
   getMenu,
   getRestaurantTheme,
+  setItemsAvailability,
   updateMenuItem,
   updateRestaurantTheme,
 } from "../api/adminApi";
@@ -238,6 +239,26 @@ export default function AdminDashboard() {
     }
   };
 
+  // -------------------------
+  // Sold-out ("86") toggle
+  // -------------------------
+  const handleToggleAvailability = async (it) => {
+    if (!it?.id) return;
+    if (!activeSlug) return;
+    const available = it.isAvailable === false;
+
+    try {
+      setStatus(available ? "Marking item available..." : "Marking item sold out...");
+      await setItemsAvailability(activeSlug, { itemIds: [it.id], available });
+      setItems((prev) =>
+        prev.map((x) => (x.id === it.id ? { ...x, isAvailable: available } : x))
+      );
+      setStatus(available ? "✅ Item available again." : "✅ Item marked sold out.");
+    } catch (err) {
+      setStatus(`❌ ${err.message}`);
+    }
+  };
+
   // -------------------------
   // Save edit handler
   // -------------------------
@@ -678,6 +699,29 @@ export default function AdminDashboard() {
                         >
                           ✏️
                         </button>
+                        <button
+                          type="button"
+                          title={
+                            it.isAvailable === false
+                              ? "Mark available"
+                              : "Mark sold out"
+                          }
+                          style={styles.iconBtn}
+                          onClick={() => handleToggleAvailability(it)}
+                          onMouseEnter={(e) => {
+                            e.currentTarget.style.transform =
+                              "translateY(-1px)";
+                            e.currentTarget.style.boxShadow =
+                              "0 4px 12px rgba(0,0,0,0.35)";
+                          }}
+                          onMouseLeave={(e) => {
+                            e.currentTarget.style.transform = "translateY(0)";
+                            e.currentTarget.style.boxShadow =
+                              "0 2px 8px rgba(0,0,0,0.25)";
+                          }}
+                        >
+                          {it.isAvailable === false ? "✅" : "🚫"}
+                        </button>
                         <button
                           type="button"
                           title="Delete"
@@ -703,7 +747,11 @@ export default function AdminDashboard() {
                           🗑️
                         </button>
                       </div>
-                      <DishCard item={it} />
+                      <div
+                        style={it.isAvailable === false ? styles.soldOut : undefined}
+                      >
+                        <DishCard item={it} />
+                      </div>
                     </div>
                   ))}
                 </div>
@@ -1065,6 +1113,10 @@ const styles = {
   cardWrap: {
     position: "relative",
   },
+  soldOut: {
+    opacity: 0.45,
+    filter: "grayscale(0.6)",
+  },
   itemActions: {
     position: "absolute",
     top: 10,